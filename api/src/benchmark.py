@@ -0,0 +1,279 @@
+"""
+In-process API Load and Latency Benchmark
+
+Drives the FastAPI app through an ASGI transport (no server needed)
+against a local mongod, seeding a synthetic catalog first. Cloudinary is
+stubbed so pet creation measures only this API.
+
+Needs the "bench" dependency group (uv sync --group bench).
+
+Usage:
+    python -m src.benchmark --pets 10000 --ngos 50
+    python -m src.benchmark --pets 100000 --baseline benchmark_baseline.json
+
+The database named by BENCHMARK_DATABASE_NAME (default "pets_paws_bench")
+is dropped and re-seeded on every run.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before any settings are loaded
+os.environ["DATABASE_NAME"] = os.getenv("BENCHMARK_DATABASE_NAME", "pets_paws_bench")
+# Every request comes from one client; per-IP rate limits would skew the numbers
+os.environ.setdefault("ADMISSION_CONTROL_ENABLED", "false")
+
+import httpx
+from PIL import Image
+
+from .main import app
+from .db.db_config import get_client, get_database
+from .db.indexes import init_db
+from .routes import pets as pets_routes
+from .utils.security import hash_password
+
+# Colors for terminal output
+class Colors:
+    GREEN = '\033[92m'
+    RED = '\033[91m'
+    YELLOW = '\033[93m'
+    BLUE = '\033[94m'
+    END = '\033[0m'
+
+PASSWORD = "benchmark-password"
+CITIES = [
+    "Mumbai, MH", "Pune, MH", "Delhi, DL", "Bengaluru, KA", "Chennai, TN",
+    "Kolkata, WB", "Hyderabad, TG", "Jaipur, RJ", "Goa, GA", "Kochi, KL",
+]
+
+# Distinct image per upload so deduplication does not skip the stub
+def make_image(seed: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (seed % 256, (seed // 256) % 256, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+async def stub_upload(content: bytes, folder: str = "pets_paws") -> str:
+    """Stand-in for Cloudinary with a small fixed latency"""
+    await asyncio.sleep(0.005)
+    return f"https://res.cloudinary.com/benchmark/image/upload/v1/{folder}/{len(content)}.webp"
+
+async def seed(pet_count: int, ngo_count: int, batch_size: int = 10000) -> dict:
+    """Drop the benchmark database and insert NGOs, adopters and pets"""
+    db = get_database()
+    await get_client().drop_database(db.name)
+    await init_db()
+
+    now = datetime.utcnow()
+    ngos = [{
+        "email": f"ngo{i}@bench.example.com",
+        "password_hash": hash_password(PASSWORD),
+        "name": f"Benchmark NGO {i}",
+        "user_type": "NGO",
+        "created_at": now
+    } for i in range(ngo_count)]
+    adopter = {
+        "email": "adopter@bench.example.com",
+        "password_hash": hash_password(PASSWORD),
+        "name": "Benchmark Adopter",
+        "user_type": "Adopter",
+        "created_at": now
+    }
+    await db.users.insert_many([*ngos, adopter])
+
+    principals = [{
+        "id": str(ngo["_id"]),
+        "email": ngo["email"],
+        "name": ngo["name"],
+        "user_type": "NGO"
+    } for ngo in ngos]
+
+    pet_ids = []
+    for start in range(0, pet_count, batch_size):
+        docs = []
+        for i in range(start, min(start + batch_size, pet_count)):
+            ngo = principals[i % ngo_count]
+            doc = pets_routes._build_pet_document(
+                ngo,
+                {
+                    "name": f"Pet {i}",
+                    "type": random.choice(["Dog", "Cat"]),
+                    "age": random.randint(0, 15),
+                    "location": random.choice(CITIES),
+                    "vaccinated": random.random() < 0.7,
+                    "neutered": random.random() < 0.5,
+                    "medical_notes": None
+                },
+                f"https://res.cloudinary.com/benchmark/image/upload/v1/pets/{i}.webp",
+                "ready"
+            )
+            doc["created_at"] = now - timedelta(seconds=pet_count - i)
+            docs.append(doc)
+        result = await db.pets.insert_many(docs, ordered=False)
+        pet_ids.extend(str(pet_id) for pet_id in result.inserted_ids[:1000])
+
+    return {"ngos": principals, "pet_ids": pet_ids}
+
+def summarize(latencies: list[float], errors: int, wall_seconds: float) -> dict:
+    ordered = sorted(latencies)
+    cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall_seconds, 1) if wall_seconds else 0.0,
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+async def run_scenario(http: httpx.AsyncClient, make_request, total: int, concurrency: int) -> dict:
+    """Issue `total` requests from `concurrency` concurrent workers"""
+    latencies: list[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await make_request(http, i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - wall_started)
+
+async def run_benchmarks(args) -> dict:
+    pets_routes.upload_bytes_to_cloudinary = stub_upload
+
+    print(f"{Colors.BLUE}Seeding {args.pets} pets across {args.ngos} NGOs...{Colors.END}")
+    seeded_started = time.perf_counter()
+    data = await seed(args.pets, args.ngos)
+    print(f"{Colors.GREEN}✓ Seeded in {time.perf_counter() - seeded_started:.1f}s{Colors.END}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+        # One warm session per NGO for the authenticated scenarios
+        tokens = []
+        for ngo in data["ngos"]:
+            response = await http.post("/api/login", json={"email": ngo["email"], "password": PASSWORD})
+            tokens.append(response.json()["token"])
+
+        def auth(i):
+            return {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+
+        run_id = int(time.time())
+        scenarios = {
+            "signup": lambda http, i: http.post("/api/signup", json={
+                "email": f"signup{run_id}_{i}@bench.example.com",
+                "password": PASSWORD,
+                "name": f"Signup {i}",
+                "user_type": "Adopter"
+            }),
+            "login": lambda http, i: http.post("/api/login", json={
+                "email": data["ngos"][i % len(data["ngos"])]["email"],
+                "password": PASSWORD
+            }),
+            "me": lambda http, i: http.get("/api/me", headers=auth(i)),
+            "catalog": lambda http, i: http.get("/api/pets", params={
+                "limit": 20,
+                **({"type": "Dog"} if i % 3 == 0 else {}),
+                **({"location": CITIES[i % len(CITIES)].split(",")[0]} if i % 4 == 0 else {})
+            }),
+            "pet_detail": lambda http, i: http.get(f"/api/pets/{data['pet_ids'][i % len(data['pet_ids'])]}"),
+            "dashboard": lambda http, i: http.get("/api/ngo/dashboard", headers=auth(i)),
+            "create_pet": lambda http, i: http.post("/api/pets", headers=auth(i), data={
+                "name": f"Created {i}",
+                "type": "Dog",
+                "age": "2",
+                "location": CITIES[i % len(CITIES)],
+                "vaccinated": "true",
+                "neutered": "false"
+            }, files={"image": ("pet.png", make_image(i), "image/png")}),
+        }
+
+        selected = args.scenarios or list(scenarios)
+        results = {}
+        for name in selected:
+            total = max(1, args.requests // 5) if name in ("signup", "create_pet") else args.requests
+            results[name] = await run_scenario(http, scenarios[name], total, args.concurrency)
+            print_result(name, results[name])
+
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {
+            "pets": args.pets,
+            "ngos": args.ngos,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+
+def print_result(name: str, result: dict):
+    color = Colors.RED if result["errors"] else Colors.GREEN
+    print(
+        f"{color}{name:<12}{Colors.END} "
+        f"{result['rps']:>9.1f} req/s  "
+        f"p50 {result['p50_ms']:>8.2f} ms  "
+        f"p95 {result['p95_ms']:>8.2f} ms  "
+        f"p99 {result['p99_ms']:>8.2f} ms  "
+        f"errors {result['errors']}"
+    )
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Return regressions where p95 rose or throughput fell by more than `threshold`"""
+    regressions = []
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {before['p95_ms']} ms -> {result['p95_ms']} ms")
+        if before["rps"] and result["rps"] < before["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {before['rps']} req/s -> {result['rps']} req/s")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="In-process API benchmark")
+    parser.add_argument("--pets", type=int, default=10000, help="pets to seed (e.g. 10000 to 1000000)")
+    parser.add_argument("--ngos", type=int, default=50, help="NGO accounts to seed")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per read scenario")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent in-flight requests")
+    parser.add_argument("--scenarios", nargs="*", help="subset of scenarios to run")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to save results")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--regression-threshold", type=float, default=0.10,
+                        help="relative p95/throughput change treated as a regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmarks(args))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n{Colors.BLUE}Results saved to {args.output}{Colors.END}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.regression_threshold)
+        for regression in regressions:
+            print(f"{Colors.RED}✗ Regression: {regression}{Colors.END}")
+        if regressions:
+            return 1
+        print(f"{Colors.GREEN}✓ No regressions against {args.baseline}{Colors.END}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,29 @@
-from .db_config import get_database, init_db, test_connection
+from .db_config import get_client, get_database, close_client, test_connection, warm_up_pool
+from .indexes import init_db
 from .models import (
     SignupRequest,
     LoginRequest,
     UserResponse,
     AuthResponse,
     PetRequest,
-    PetResponse
+    PetResponse,
+    PetImportRow,
+    NgoSummary
 )
 
 __all__ = [
+    "get_client",
     "get_database",
+    "close_client",
     "init_db",
     "test_connection",
+    "warm_up_pool",
     "SignupRequest",
     "LoginRequest",
     "UserResponse",
     "AuthResponse",
     "PetRequest",
-    "PetResponse"
+    "PetResponse",
+    "PetImportRow",
+    "NgoSummary"
 ]
\ No newline at end of file
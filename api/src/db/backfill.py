@@ -0,0 +1,116 @@
+"""
+One-time data backfills
+
+Run with: python -m src.db.backfill
+"""
+import asyncio
+
+from pymongo import UpdateOne
+from pymongo.asynchronous.database import AsyncDatabase
+
+from .db_config import get_database
+from .ngo_stats import rebuild_ngo_stats
+from .ngo_summary import refresh_ngo_summaries
+from ..utils.geo import geo_point
+from ..utils.location import tokenize_location
+
+
+async def backfill_location_tokens(db: AsyncDatabase, batch_size: int = 500) -> int:
+    """
+    Add location_tokens to pets created before location search was indexed
+
+    Also retokenizes non-ASCII locations, which earlier versions reduced to
+    their ASCII letters only.
+    """
+    updated = 0
+    batch = []
+
+    cursor = db.pets.find(
+        {"$or": [
+            {"location_tokens": {"$exists": False}},
+            {"location": {"$regex": "[^\\x00-\\x7f]"}}
+        ]},
+        {"location": 1}
+    ).batch_size(batch_size)
+
+    async for pet in cursor:
+        batch.append(UpdateOne(
+            {"_id": pet["_id"]},
+            {"$set": {"location_tokens": tokenize_location(pet.get("location", ""))}}
+        ))
+        if len(batch) >= batch_size:
+            result = await db.pets.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+
+    if batch:
+        result = await db.pets.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+
+    return updated
+
+
+async def backfill_geo(db: AsyncDatabase, batch_size: int = 500) -> int:
+    """
+    Resolve a GeoJSON point for pets created before "pets near me"
+
+    Pets whose location is not in the gazetteer keep geo=null; rerun after
+    extending the gazetteer to pick them up.
+    """
+    updated = 0
+    batch = []
+
+    cursor = db.pets.find({"geo": None}, {"location": 1}).batch_size(batch_size)
+
+    async for pet in cursor:
+        point = geo_point(pet.get("location", ""))
+        if point is None:
+            continue
+        batch.append(UpdateOne({"_id": pet["_id"]}, {"$set": {"geo": point}}))
+        if len(batch) >= batch_size:
+            result = await db.pets.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+
+    if batch:
+        result = await db.pets.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+
+    return updated
+
+
+async def backfill_ngo_summaries(db: AsyncDatabase) -> int:
+    """Embed NGO summaries on pets created before they were denormalized"""
+    updated = 0
+    ngo_user_ids = await db.pets.distinct("ngo_user_id", {"ngo": {"$exists": False}})
+
+    for ngo_user_id in ngo_user_ids:
+        updated += await refresh_ngo_summaries(db, ngo_user_id)
+
+    return updated
+
+
+async def backfill_ngo_stats(db: AsyncDatabase) -> int:
+    """Rebuild the ngo_stats document of every NGO that lists pets"""
+    ngo_user_ids = await db.pets.distinct("ngo_user_id")
+
+    for ngo_user_id in ngo_user_ids:
+        await rebuild_ngo_stats(db, ngo_user_id)
+
+    return len(ngo_user_ids)
+
+
+async def main():
+    db = get_database()
+    updated = await backfill_location_tokens(db)
+    print(f"✓ Backfilled location_tokens on {updated} pets")
+    updated = await backfill_geo(db)
+    print(f"✓ Backfilled geo points on {updated} pets")
+    updated = await backfill_ngo_summaries(db)
+    print(f"✓ Backfilled NGO summaries on {updated} pets")
+    rebuilt = await backfill_ngo_stats(db)
+    print(f"✓ Rebuilt dashboard stats for {rebuilt} NGOs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""Monotonic version of the public pet catalog, bumped on every pet write"""
+from datetime import datetime
+from typing import Optional
+
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.read_concern import ReadConcern
+
+from .db_config import get_client, get_database
+
+CATALOG_VERSION_ID = "pets_catalog"
+
+
+class CatalogSnapshot:
+    """The catalog database, a causally consistent session and the version read in it"""
+
+    def __init__(self, db: AsyncDatabase, session: AsyncClientSession, version: int):
+        self.db = db
+        self.session = session
+        self.version = version
+
+
+async def get_catalog_version(db: AsyncDatabase, session: Optional[AsyncClientSession] = None) -> int:
+    """Current catalog version (a single _id point read)"""
+    doc = await db.meta.find_one({"_id": CATALOG_VERSION_ID}, {"version": 1}, session=session)
+    return doc["version"] if doc else 0
+
+
+async def catalog_snapshot():
+    """
+    FastAPI dependency giving a request a consistent view of the catalog
+
+    The version is read from the primary (majority read concern) in a
+    causally consistent session. Catalog reads made with `session` may go
+    to a secondary, but that secondary waits until it has caught up with
+    the version read, so an ETag built from the version never labels an
+    older body.
+    """
+    async with get_client().start_session(causal_consistency=True) as session:
+        primary = get_database().with_options(read_concern=ReadConcern("majority"))
+        version = await get_catalog_version(primary, session)
+        yield CatalogSnapshot(get_database("catalog"), session, version)
+
+
+async def bump_catalog_version(db: AsyncDatabase):
+    """Record that the catalog changed so cached listings revalidate"""
+    await db.meta.update_one(
+        {"_id": CATALOG_VERSION_ID},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
@@ -0,0 +1,155 @@
+"""Count strategies for listing endpoints"""
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.collection import AsyncCollection
+
+from ..utils.config import settings
+from ..utils.metrics import CacheMetrics
+
+
+def normalize_filter(query: dict) -> str:
+    """Stable cache key for a Mongo filter regardless of key order"""
+    return json.dumps(query, sort_keys=True, default=str)
+
+
+class CountCache:
+    """
+    Bounded TTL cache of document counts per (collection, filter, version)
+
+    Passing the catalog version keeps counts consistent with ETags built
+    from it: a write in any worker bumps the version, so every worker
+    misses and recounts instead of serving a count from before the write.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: str = "count"):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple[str, str, Optional[int]], tuple[int, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # The same counters, published on /metrics
+        self.metrics = CacheMetrics(name)
+
+    def get(self, collection: str, query: dict, version: Optional[int] = None) -> Optional[int]:
+        key = (collection, normalize_filter(query), version)
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[1]:
+            if self._entries.pop(key, None) is not None:
+                self.metrics.entries.set(len(self._entries))
+            self.misses += 1
+            self.metrics.miss.inc()
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.metrics.hit.inc()
+        return entry[0]
+
+    def set(self, collection: str, query: dict, count: int, version: Optional[int] = None):
+        if self.max_entries <= 0:
+            return
+
+        key = (collection, normalize_filter(query), version)
+        self._entries[key] = (count, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            self.metrics.eviction.inc()
+        self.metrics.entries.set(len(self._entries))
+
+    def invalidate(self, collection: str):
+        """Drop every cached count for a collection (call after writes)"""
+        for key in [key for key in self._entries if key[0] == collection]:
+            del self._entries[key]
+        self.metrics.entries.set(len(self._entries))
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+count_cache = CountCache(
+    max_entries=settings.COUNT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.COUNT_CACHE_TTL_SECONDS,
+)
+
+
+async def count_documents_cached(
+    collection: AsyncCollection,
+    query: dict,
+    session: Optional[AsyncClientSession] = None,
+    version: Optional[int] = None
+) -> int:
+    """
+    Count documents matching a filter, served from the count cache when warm
+
+    Unfiltered counts use collection metadata (estimated_document_count)
+    instead of scanning the collection. `version` (the catalog version)
+    is part of the cache key.
+    """
+    cached = count_cache.get(collection.name, query, version)
+    if cached is not None:
+        return cached
+
+    if query:
+        count = await collection.count_documents(query, session=session)
+    else:
+        count = await collection.estimated_document_count()
+
+    count_cache.set(collection.name, query, count, version)
+    return count
+
+
+async def find_with_total(
+    collection: AsyncCollection,
+    query: dict,
+    page_filter: dict,
+    sort: list,
+    skip: int,
+    limit: int,
+    projection: Optional[dict] = None,
+    session: Optional[AsyncClientSession] = None,
+    version: Optional[int] = None
+) -> tuple[list, int]:
+    """
+    Fetch one page and the exact total for `query` in a single round trip
+
+    `page_filter` (e.g. a keyset cursor) narrows the page but not the total.
+    """
+    page_pipeline = []
+    if page_filter:
+        page_pipeline.append({"$match": page_filter})
+    page_pipeline.append({"$sort": dict(sort)})
+    if skip:
+        page_pipeline.append({"$skip": skip})
+    if limit > 0:
+        page_pipeline.append({"$limit": limit})
+    if projection:
+        page_pipeline.append({"$project": projection})
+
+    results = await (await collection.aggregate([
+        {"$match": query},
+        {"$facet": {
+            "items": page_pipeline,
+            "total": [{"$count": "count"}]
+        }}
+    ], session=session)).to_list()
+
+    facet = results[0] if results else {"items": [], "total": []}
+    total = facet["total"][0]["count"] if facet["total"] else 0
+
+    # An exact count is as good as a cached one; keep it warm
+    count_cache.set(collection.name, query, total, version)
+    return facet["items"], total
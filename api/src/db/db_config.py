@@ -1,52 +1,145 @@
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
-from pymongo.database import Database
+import asyncio
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
+import time
+from typing import Optional
 
-MONGODB_URI = os.getenv("MONGODB_URI")
+from pymongo import AsyncMongoClient
+from pymongo import read_preferences
+from pymongo.read_concern import ReadConcern
+from pymongo.server_api import ServerApi
+from pymongo.asynchronous.database import AsyncDatabase
 
-if not MONGODB_URI:
-    raise ValueError(
-        "MONGODB_URI environment variable is not set. "
-        "Please set it in your .env file or environment."
-    )
+from ..utils.admission import pool_wait_tracker
+from ..utils.config import settings
+from ..utils.metrics import MONGO_POOL_WARMUP_SECONDS, mongo_event_listeners
+from .slow_queries import slow_query_recorder
 
 # Database name
-DATABASE_NAME = "pets_paws_db"
-
-# Create MongoDB client
-client = MongoClient(MONGODB_URI, server_api=ServerApi('1'))
-
-def get_database() -> Database:
-    """Get database instance"""
-    return client[DATABASE_NAME]
-
-def init_db():
-    """Initialize database with indexes"""
-    db = get_database()
-    
-    # Create indexes for users collection
-    db.users.create_index("email", unique=True)
-    
-    # Create indexes for sessions collection
-    db.sessions.create_index("token", unique=True)
-    db.sessions.create_index("expires_at")
-    
-    # Create indexes for pets collection
-    db.pets.create_index("ngo_user_id")
-    
-    print("✓ Database indexes initialized successfully!")
-
-def test_connection():
+DATABASE_NAME = settings.DATABASE_NAME
+
+# Read preference per query class: (mode, maxStalenessSeconds or -1)
+# "primary" serves auth, dashboards and writes; "catalog" serves public browsing
+QUERY_CLASSES = {
+    "primary": ("primary", -1),
+    "catalog": (settings.CATALOG_READ_PREFERENCE, settings.CATALOG_MAX_STALENESS_SECONDS),
+}
+
+_READ_PREFERENCE_MODES = {
+    "primaryPreferred": read_preferences.PrimaryPreferred,
+    "secondary": read_preferences.Secondary,
+    "secondaryPreferred": read_preferences.SecondaryPreferred,
+    "nearest": read_preferences.Nearest,
+}
+
+# Built on first use so importing the app never touches the network
+_client: Optional[AsyncMongoClient] = None
+_databases: dict[str, AsyncDatabase] = {}
+
+def _forget_client_after_fork():
+    """A forked child must never reuse its parent's client; build a fresh one"""
+    global _client
+    _client = None
+    _databases.clear()
+
+os.register_at_fork(after_in_child=_forget_client_after_fork)
+
+def get_client() -> AsyncMongoClient:
+    """
+    Get the shared MongoDB client, creating it on first call
+
+    Raises:
+        ValueError: If MONGODB_URI is not configured
+    """
+    global _client
+    if _client is None:
+        if not settings.MONGODB_URI:
+            raise ValueError(
+                "MONGODB_URI environment variable is not set. "
+                "Please set it in your .env file."
+            )
+
+        # Connections are opened lazily on first use (or by warm_up_pool)
+        _client = AsyncMongoClient(
+            settings.MONGODB_URI,
+            server_api=ServerApi('1'),
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            connectTimeoutMS=settings.MONGODB_CONNECT_TIMEOUT_MS,
+            serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+            socketTimeoutMS=settings.MONGODB_SOCKET_TIMEOUT_MS,
+            waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=[
+                *(mongo_event_listeners() if settings.METRICS_ENABLED else []),
+                *([slow_query_recorder] if settings.SLOW_QUERY_THRESHOLD_MS >= 0 else []),
+                *([pool_wait_tracker] if settings.ADMISSION_CONTROL_ENABLED else []),
+            ],
+        )
+        slow_query_recorder.attach(_client)
+    return _client
+
+def read_preference_for(query_class: str):
+    """
+    Read preference configured for a query class
+
+    Raises:
+        ValueError: If the class or its configured mode is unknown
+    """
+    if query_class not in QUERY_CLASSES:
+        raise ValueError(f"Unknown query class '{query_class}'")
+
+    mode, max_staleness = QUERY_CLASSES[query_class]
+    if mode == "primary":
+        return read_preferences.Primary()
+    if mode not in _READ_PREFERENCE_MODES:
+        raise ValueError(f"Unknown read preference '{mode}' for query class '{query_class}'")
+    return _READ_PREFERENCE_MODES[mode](max_staleness=max_staleness)
+
+def get_database(query_class: str = "primary") -> AsyncDatabase:
+    """
+    Get database instance
+
+    Args:
+        query_class: "primary" (default) or "catalog" for public reads that
+            may be served by a replica-set secondary (see QUERY_CLASSES)
+    """
+    if query_class not in _databases:
+        # Majority reads let catalog_snapshot() order secondary reads after the primary
+        _databases[query_class] = get_client().get_database(
+            DATABASE_NAME,
+            read_preference=read_preference_for(query_class),
+            read_concern=ReadConcern("majority") if query_class != "primary" else None
+        )
+    return _databases[query_class]
+
+async def close_client():
+    """Close the shared client (a later get_client() builds a new one)"""
+    global _client
+    _databases.clear()
+    if _client is not None:
+        client, _client = _client, None
+        await client.close()
+
+async def test_connection():
     """Test MongoDB connection"""
     try:
-        client.admin.command('ping')
+        await get_client().admin.command('ping')
         print("✓ Successfully connected to MongoDB!")
         return True
     except Exception as e:
         print(f"✗ Failed to connect to MongoDB: {e}")
-        return False
\ No newline at end of file
+        return False
+
+async def warm_up_pool(connections: int) -> float:
+    """
+    Open up to `connections` pooled connections by pinging concurrently
+
+    Returns:
+        Seconds taken (also exported as mongodb_pool_warmup_seconds)
+    """
+    started = time.perf_counter()
+    admin = get_client().admin
+    await asyncio.gather(*(admin.command('ping') for _ in range(max(connections, 1))))
+    elapsed = time.perf_counter() - started
+    MONGO_POOL_WARMUP_SECONDS.set(elapsed)
+    print(f"✓ Warmed up {connections} MongoDB connection(s) in {elapsed * 1000:.0f} ms")
+    return elapsed
@@ -0,0 +1,121 @@
+"""Faceted pet search: one page plus facet counts in a single aggregation"""
+from typing import Optional
+
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.collection import AsyncCollection
+
+from ..utils.config import settings
+from ..utils.pagination import PET_SORT
+from .counts import CountCache
+
+# Age buckets as (label, lower bound inclusive, upper bound exclusive)
+AGE_BUCKETS = [
+    ("<1", 0, 1),
+    ("1-2", 1, 3),
+    ("3-6", 3, 7),
+    ("7-10", 7, 11),
+    ("11+", 11, 1000),
+]
+_AGE_LABELS = {lower: label for label, lower, _ in AGE_BUCKETS}
+
+# Facet counts per filter, dropped whenever pets are written in this process
+facet_cache = CountCache(
+    max_entries=settings.FACET_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.FACET_CACHE_TTL_SECONDS,
+    name="facet",
+)
+
+
+def age_bucket_filter(label: str) -> dict:
+    """Filter selecting pets in one age bucket"""
+    for bucket, lower, upper in AGE_BUCKETS:
+        if bucket == label:
+            return {"age": {"$gte": lower, "$lt": upper}}
+    raise ValueError(f"Unknown age bucket '{label}'")
+
+
+def _count_by(field: str) -> list:
+    """Stages counting documents per value of `field`, most common first"""
+    return [
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+    ]
+
+
+def _facet_pipelines() -> dict:
+    """$facet sub-pipelines producing the counts"""
+    return {
+        "total": [{"$count": "count"}],
+        "type": _count_by("type"),
+        "vaccinated": _count_by("vaccinated"),
+        "neutered": _count_by("neutered"),
+        "age": [{"$bucket": {
+            "groupBy": "$age",
+            "boundaries": [lower for _, lower, _ in AGE_BUCKETS] + [AGE_BUCKETS[-1][2]],
+            "default": "unknown",
+        }}],
+        "location": _count_by("location") + [{"$limit": settings.FACET_LOCATION_LIMIT}],
+    }
+
+
+def _key(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _parse_facets(raw: dict) -> tuple[dict, int]:
+    """$facet output -> ({facet: {value: count}}, total)"""
+    facets = {
+        name: {_key(bucket["_id"]): bucket["count"] for bucket in raw.get(name, [])}
+        for name in ("type", "vaccinated", "neutered", "location")
+    }
+    facets["age"] = {
+        _AGE_LABELS.get(bucket["_id"], _key(bucket["_id"])): bucket["count"]
+        for bucket in raw.get("age", [])
+    }
+    total = raw["total"][0]["count"] if raw.get("total") else 0
+    return facets, total
+
+
+async def search_with_facets(
+    collection: AsyncCollection,
+    query: dict,
+    page_filter: dict,
+    limit: int,
+    projection: Optional[dict] = None,
+    session: Optional[AsyncClientSession] = None,
+    version: Optional[int] = None
+) -> tuple[list, int, dict]:
+    """
+    Fetch one page, the total and every facet count for `query`
+
+    Cold filters take a single $facet aggregation. While the facets for a
+    filter are cached, only the page is read (an indexed find).
+    `page_filter` (a keyset cursor) narrows the page but not the counts.
+    Cached counts are keyed by `version` (the catalog version).
+    """
+    cached = facet_cache.get(collection.name, query, version)
+    if cached is not None:
+        items = await collection.find(
+            {**query, **page_filter}, projection, session=session
+        ).sort(PET_SORT).limit(limit).to_list()
+        return items, cached["total"], cached["facets"]
+
+    page_pipeline = []
+    if page_filter:
+        page_pipeline.append({"$match": page_filter})
+    page_pipeline.append({"$sort": dict(PET_SORT)})
+    page_pipeline.append({"$limit": limit})
+    if projection:
+        page_pipeline.append({"$project": projection})
+
+    results = await (await collection.aggregate([
+        {"$match": query},
+        {"$facet": {"items": page_pipeline, **_facet_pipelines()}}
+    ], session=session)).to_list()
+
+    raw = results[0] if results else {}
+    facets, total = _parse_facets(raw)
+    facet_cache.set(collection.name, query, {"total": total, "facets": facets}, version)
+    return raw.get("items", []), total, facets
@@ -0,0 +1,231 @@
+"""
+Declarative index registry and migration runner
+
+Usage:
+    python -m src.db.indexes            # build missing indexes, report extras
+    python -m src.db.indexes --check    # also fail if a query shape COLLSCANs
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, IndexModel
+from pymongo.asynchronous.database import AsyncDatabase
+
+from .db_config import get_database
+from .facets import age_bucket_filter
+from ..utils.export import EXPORT_SORT
+from ..utils.geo import within_radius
+from ..utils.location import location_query
+from ..utils.pagination import PET_SORT, encode_cursor, keyset_filter
+
+# Every index the application relies on, per collection
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "sessions": [
+        IndexModel([("token", ASCENDING)], unique=True),
+        IndexModel([("expires_at", ASCENDING)]),
+    ],
+    "revoked_tokens": [
+        # Expire revocations once the token itself would have expired
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        IndexModel([("created_at", ASCENDING)]),
+    ],
+    "pets": [
+        # Catalog, newest first (optionally after a keyset cursor)
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+        # Catalog filtered by type and/or location
+        IndexModel([("type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("location_tokens", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([
+            ("type", ASCENDING),
+            ("location_tokens", ASCENDING),
+            ("created_at", DESCENDING),
+            ("_id", DESCENDING),
+        ]),
+        # Search filters: equality first, then the sort keys. Age buckets are
+        # ranges and walk the catalog index above in sort order instead
+        IndexModel([("vaccinated", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("neutered", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        # Pets near a point ($geoNear and radius counts)
+        IndexModel([("geo", GEOSPHERE)]),
+        # NGO dashboard
+        IndexModel([("ngo_user_id", ASCENDING), ("created_at", DESCENDING)]),
+        # Image upload queue recovery on startup
+        IndexModel(
+            [("image_status", ASCENDING)],
+            partialFilterExpression={"image_status": "pending"}
+        ),
+    ],
+}
+
+
+def _sample_cursor() -> str:
+    return encode_cursor({"created_at": datetime.utcnow(), "_id": ObjectId()})
+
+
+# Representative query shapes issued by routes/, checked with explain()
+QUERY_SHAPES = [
+    ("auth.session_lookup", "sessions",
+     {"token": "sample", "expires_at": {"$gt": datetime.utcnow()}}, None),
+    ("auth.signup_email", "users", {"email": "sample@example.com"}, None),
+    ("auth.login", "users",
+     {"email": "sample@example.com", "password_hash": "sample"}, None),
+    ("auth.revocation_sync", "revoked_tokens",
+     {"created_at": {"$gte": datetime.utcnow()}, "expires_at": {"$gt": datetime.utcnow()}}, None),
+    ("pets.catalog", "pets", {}, PET_SORT),
+    ("pets.catalog_cursor", "pets", keyset_filter(_sample_cursor()), PET_SORT),
+    ("pets.catalog_type", "pets", {"type": "Dog"}, PET_SORT),
+    ("pets.catalog_location", "pets", location_query("new york"), PET_SORT),
+    ("pets.catalog_type_location", "pets",
+     {"type": "Dog", **location_query("new york", "token")}, PET_SORT),
+    ("pets.search_vaccinated", "pets", {"vaccinated": True}, PET_SORT),
+    ("pets.search_neutered", "pets", {"neutered": False}, PET_SORT),
+    ("pets.search_age", "pets", age_bucket_filter("3-6"), PET_SORT),
+    ("pets.search_type_filters", "pets",
+     {"type": "Dog", "vaccinated": True, "neutered": True, **age_bucket_filter("1-2")}, PET_SORT),
+    ("pets.export_since", "pets", {"created_at": {"$gte": datetime.utcnow()}}, EXPORT_SORT),
+    ("pets.export_type_since", "pets",
+     {"type": "Dog", "created_at": {"$gte": datetime.utcnow()}}, EXPORT_SORT),
+    ("pets.near_count", "pets", within_radius((73.8567, 18.5204), 25), None),
+    ("pets.detail", "pets", {"_id": ObjectId()}, None),
+    ("ngo.dashboard", "pets", {"ngo_user_id": "sample"}, [("created_at", DESCENDING)]),
+    ("images.pending", "pets", {"image_status": "pending"}, None),
+]
+
+
+def _key(spec) -> tuple:
+    return tuple((field, direction) for field, direction in spec.items())
+
+
+async def sync_indexes(db: AsyncDatabase, drop_unregistered: bool = False) -> dict:
+    """
+    Diff the registry against list_indexes() and build what is missing
+
+    Returns a report per collection with the indexes that were created,
+    indexes present on the server but not registered, and indexes that
+    have not been used since the server last restarted.
+    """
+    report = {}
+
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        existing = {
+            index["name"]: _key(index["key"])
+            async for index in await collection.list_indexes()
+        }
+        registered_keys = {_key(model.document["key"]) for model in models}
+
+        missing = [
+            model for model in models
+            if _key(model.document["key"]) not in existing.values()
+        ]
+        created = await collection.create_indexes(missing) if missing else []
+
+        unregistered = [
+            name for name, key in existing.items()
+            if name != "_id_" and key not in registered_keys
+        ]
+        if drop_unregistered:
+            for name in unregistered:
+                await collection.drop_index(name)
+
+        unused = []
+        try:
+            stats = await (await collection.aggregate([{"$indexStats": {}}])).to_list()
+            unused = [
+                stat["name"] for stat in stats
+                if stat["name"] != "_id_" and stat["accesses"]["ops"] == 0
+            ]
+        except Exception:
+            # $indexStats needs clusterMonitor privileges on some deployments
+            pass
+
+        report[collection_name] = {
+            "created": created,
+            "unregistered": unregistered,
+            "dropped": unregistered if drop_unregistered else [],
+            "unused": unused,
+        }
+
+    return report
+
+
+def _plan_stages(plan) -> set:
+    """Collect every stage name in an explain() plan tree"""
+    stages = set()
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.add(plan["stage"])
+        for value in plan.values():
+            stages |= _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            stages |= _plan_stages(item)
+    return stages
+
+
+async def check_query_plans(db: AsyncDatabase) -> list:
+    """Return (shape name, stages) for every registered query shape that COLLSCANs"""
+    failures = []
+
+    for name, collection_name, query, sort in QUERY_SHAPES:
+        cursor = db[collection_name].find(query).limit(20)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        if "COLLSCAN" in stages:
+            failures.append((name, sorted(stages)))
+
+    return failures
+
+
+async def init_db():
+    """Initialize database with indexes"""
+    report = await sync_indexes(get_database())
+
+    for collection_name, result in report.items():
+        for name in result["created"]:
+            print(f"✓ Created index {collection_name}.{name}")
+        for name in result["unregistered"]:
+            print(f"ℹ Index {collection_name}.{name} is not in the registry")
+
+    print("✓ Database indexes initialized successfully!")
+
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sync MongoDB indexes with the registry")
+    parser.add_argument("--check", action="store_true",
+                        help="explain() every registered query shape and fail on COLLSCAN")
+    parser.add_argument("--drop-unregistered", action="store_true",
+                        help="drop indexes that are not in the registry")
+    args = parser.parse_args(argv)
+
+    db = get_database()
+    report = await sync_indexes(db, drop_unregistered=args.drop_unregistered)
+
+    for collection_name, result in report.items():
+        print(f"{collection_name}:")
+        for label in ("created", "unregistered", "dropped", "unused"):
+            if result[label]:
+                print(f"  {label}: {', '.join(result[label])}")
+
+    if args.check:
+        failures = await check_query_plans(db)
+        for name, stages in failures:
+            print(f"✗ {name} uses a collection scan ({', '.join(stages)})")
+        if failures:
+            return 1
+        print(f"✓ All {len(QUERY_SHAPES)} query shapes are index-backed")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, model_validator
 from typing import Optional, Literal
 
 # Request Models
@@ -35,6 +35,22 @@ class PetRequest(BaseModel):
     neutered: bool
     medical_notes: Optional[str] = None
 
+class PetImportRow(PetRequest):
+    """One pet in a bulk import manifest"""
+    image_url: Optional[str] = None
+    image: Optional[str] = None  # Name of an uploaded image file
+
+    @model_validator(mode="after")
+    def check_image_source(self):
+        if not self.image and not self.image_url:
+            raise ValueError("Either 'image' or 'image_url' is required")
+        return self
+
+class NgoSummary(BaseModel):
+    """NGO display data embedded in each pet document"""
+    name: str
+    email: str
+
 class PetResponse(BaseModel):
     id: str
     ngo_user_id: str
@@ -46,4 +62,6 @@ class PetResponse(BaseModel):
     vaccinated: bool
     neutered: bool
     medical_notes: Optional[str]
-    created_at: str
\ No newline at end of file
+    created_at: str
+    image_status: Literal['pending', 'ready', 'failed'] = 'ready'
+    ngo: Optional[NgoSummary] = None
\ No newline at end of file
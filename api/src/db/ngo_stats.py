@@ -0,0 +1,154 @@
+"""
+Per-NGO dashboard statistics kept current on every pet write
+
+One `ngo_stats` document per NGO (keyed by the NGO's user id) holds
+counters updated with `$inc` and a short `recent_pets` array capped with
+`$slice`, so the dashboard is a single point read.
+"""
+from collections import Counter
+
+from bson import ObjectId
+from pymongo.asynchronous.database import AsyncDatabase
+
+from ..utils.config import settings
+from .serializers import PET_PROJECTION
+
+# Pet fields that feed the counters
+COUNTED_FIELDS = ("type", "vaccinated", "neutered", "image_status")
+
+
+def _counters(pet: dict) -> Counter:
+    """Counter increments contributed by one pet"""
+    return Counter({
+        "total_pets": 1,
+        f"by_type.{pet['type']}": 1,
+        "vaccinated": int(bool(pet.get("vaccinated"))),
+        "neutered": int(bool(pet.get("neutered"))),
+        f"by_listing_state.{pet.get('image_status', 'ready')}": 1,
+    })
+
+
+def _snapshot(pet: dict) -> dict:
+    """The subset of a pet kept in recent_pets (what the dashboard returns)"""
+    return {"_id": pet["_id"], **{field: pet.get(field) for field in PET_PROJECTION}}
+
+
+def stats_from_counters(counters: dict, recent_pets: list) -> dict:
+    """Dashboard stats as stored in ngo_stats"""
+    return {
+        "total_pets": counters.get("total_pets", 0),
+        "vaccinated": counters.get("vaccinated", 0),
+        "neutered": counters.get("neutered", 0),
+        "by_type": {
+            key.split(".", 1)[1]: value for key, value in counters.items() if key.startswith("by_type.")
+        },
+        "by_listing_state": {
+            key.split(".", 1)[1]: value for key, value in counters.items() if key.startswith("by_listing_state.")
+        },
+        "recent_pets": recent_pets,
+    }
+
+
+async def record_pets_created(db: AsyncDatabase, ngo_user_id: str, pet_docs: list):
+    """Add newly inserted pets (with their _id set) to the NGO's stats"""
+    if not pet_docs:
+        return
+
+    increments = Counter()
+    for pet in pet_docs:
+        increments.update(_counters(pet))
+
+    result = await db.ngo_stats.update_one(
+        {"_id": ngo_user_id},
+        {
+            "$inc": dict(increments),
+            "$push": {"recent_pets": {
+                "$each": [_snapshot(pet) for pet in pet_docs],
+                "$sort": {"created_at": -1},
+                "$slice": settings.NGO_STATS_RECENT_PETS
+            }}
+        },
+        upsert=True
+    )
+    
+    # First write for this NGO: count any pets that predate ngo_stats too
+    if result.upserted_id is not None:
+        await rebuild_ngo_stats(db, ngo_user_id)
+
+
+async def record_pet_updated(db: AsyncDatabase, ngo_user_id: str, pet_id: ObjectId, before: dict, changes: dict):
+    """
+    Apply a pet update to the NGO's stats
+
+    Args:
+        before: The pet's COUNTED_FIELDS before the update
+        changes: Fields the update set
+    """
+    after = {**before, **changes}
+    delta = Counter(_counters(after))
+    delta.subtract(_counters(before))
+    increments = {key: value for key, value in delta.items() if value}
+    if increments:
+        await db.ngo_stats.update_one({"_id": ngo_user_id}, {"$inc": increments})
+
+    # Keep the snapshot in recent_pets in step (no-op once it has aged out)
+    snapshot_changes = {
+        f"recent_pets.$.{field}": value for field, value in changes.items() if field in PET_PROJECTION
+    }
+    if snapshot_changes:
+        await db.ngo_stats.update_one(
+            {"_id": ngo_user_id, "recent_pets._id": pet_id},
+            {"$set": snapshot_changes}
+        )
+
+
+async def rebuild_ngo_stats(db: AsyncDatabase, ngo_user_id: str) -> dict:
+    """
+    Recompute one NGO's stats from its pets and store them
+
+    Used to seed the document; pet writes racing with a rebuild can be
+    lost, so run it again (e.g. via the backfill) if the two overlap.
+    """
+    counters = Counter()
+    groups = await (await db.pets.aggregate([
+        {"$match": {"ngo_user_id": ngo_user_id}},
+        {"$group": {
+            "_id": {field: f"${field}" for field in COUNTED_FIELDS},
+            "count": {"$sum": 1}
+        }}
+    ])).to_list()
+    for group in groups:
+        for key, value in _counters(group["_id"]).items():
+            counters[key] += value * group["count"]
+
+    recent = await db.pets.find(
+        {"ngo_user_id": ngo_user_id}, PET_PROJECTION
+    ).sort("created_at", -1).limit(settings.NGO_STATS_RECENT_PETS).to_list()
+
+    # Stored in the same nested shape the $inc paths update
+    stats = stats_from_counters(counters, [_snapshot(pet) for pet in recent])
+    await db.ngo_stats.replace_one({"_id": ngo_user_id}, stats, upsert=True)
+    return stats
+
+
+def _flatten(doc: dict, prefix: str = "") -> dict:
+    """{"by_type": {"Dog": 2}} -> {"by_type.Dog": 2}"""
+    flat = {}
+    for key, value in doc.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+async def get_ngo_stats(db: AsyncDatabase, ngo_user_id: str) -> dict:
+    """Read an NGO's stats, building them on first use"""
+    doc = await db.ngo_stats.find_one({"_id": ngo_user_id})
+    if doc is None:
+        return await rebuild_ngo_stats(db, ngo_user_id)
+
+    recent_pets = doc.pop("recent_pets", [])
+    doc.pop("_id")
+    return stats_from_counters(_flatten(doc), recent_pets)
+
@@ -0,0 +1,42 @@
+"""NGO display data denormalized onto pet documents"""
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.asynchronous.database import AsyncDatabase
+
+from .catalog_version import bump_catalog_version
+
+
+def build_ngo_summary(user: dict) -> dict:
+    """Summary of an NGO user as embedded in its pets"""
+    return {
+        "name": user.get("name", "Unknown NGO"),
+        "email": user.get("email", "")
+    }
+
+
+async def refresh_ngo_summaries(db: AsyncDatabase, ngo_user_id: str) -> int:
+    """
+    Rewrite the embedded NGO summary on every pet of an NGO
+
+    Call after an NGO's name or email changes. Returns the number of pets updated.
+    """
+    try:
+        user = await db.users.find_one({"_id": ObjectId(ngo_user_id)}, {"name": 1, "email": 1})
+    except InvalidId:
+        user = None
+
+    if not user:
+        return 0
+
+    summary = build_ngo_summary(user)
+    result = await db.pets.update_many(
+        {"ngo_user_id": ngo_user_id},
+        {"$set": {"ngo": summary}, "$inc": {"version": 1}}
+    )
+    await db.ngo_stats.update_one(
+        {"_id": ngo_user_id},
+        {"$set": {"recent_pets.$[].ngo": summary}}
+    )
+    if result.modified_count:
+        await bump_catalog_version(db)
+    return result.modified_count
@@ -0,0 +1,49 @@
+"""
+Check which replica-set member serves each query class
+
+Run with: python -m src.db.read_routing
+
+Sends `hello` with each query class's read preference (see QUERY_CLASSES
+in db_config) and prints the member that answered. Against a local
+three-node replica set, e.g.
+
+    mongod --replSet rs0 --port 27017 --dbpath /tmp/rs0-0
+    mongod --replSet rs0 --port 27018 --dbpath /tmp/rs0-1
+    mongod --replSet rs0 --port 27019 --dbpath /tmp/rs0-2
+    mongosh --port 27017 --eval 'rs.initiate({_id: "rs0", members: [
+        {_id: 0, host: "localhost:27017"},
+        {_id: 1, host: "localhost:27018"},
+        {_id: 2, host: "localhost:27019"}]})'
+
+with MONGODB_URI=mongodb://localhost:27017,localhost:27018,localhost:27019/?replicaSet=rs0,
+"catalog" should report a secondary and "primary" the primary.
+"""
+import asyncio
+import sys
+
+from .db_config import QUERY_CLASSES, get_database
+
+
+async def describe_routing() -> list:
+    """(query class, read preference, member, member state) per class"""
+    rows = []
+    for query_class in QUERY_CLASSES:
+        db = get_database(query_class)
+        # Server selection for a command with a read preference matches a find's
+        hello = await db.command("hello", read_preference=db.read_preference)
+        if hello.get("isWritablePrimary"):
+            state = "primary" if hello.get("setName") else "standalone"
+        else:
+            state = "secondary" if hello.get("secondary") else "other"
+        rows.append((query_class, db.read_preference.document, hello.get("me", "-"), state))
+    return rows
+
+
+async def main() -> int:
+    for query_class, preference, member, state in await describe_routing():
+        print(f"✓ {query_class}: {preference} -> {member} ({state})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
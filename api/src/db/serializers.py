@@ -0,0 +1,12 @@
+"""Mongo projections for pet and user documents"""
+from .models import PetResponse, UserResponse
+
+# Only the public PetResponse fields leave the database ("id" is Mongo's _id)
+PET_PROJECTION = {field: 1 for field in PetResponse.model_fields if field != "id"}
+
+# Public NGO details shown next to a pet
+NGO_PUBLIC_PROJECTION = {"name": 1, "email": 1}
+
+# Fields needed to build a UserResponse
+USER_PROJECTION = {field: 1 for field in UserResponse.model_fields if field != "id"}
+
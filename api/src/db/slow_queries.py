@@ -0,0 +1,244 @@
+"""Slow-query recorder with one-off explain capture per query shape"""
+import asyncio
+import json
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Optional
+
+from pymongo import monitoring
+
+from ..utils.config import settings
+
+# Commands worth recording, and where their filter/pipeline lives
+RECORDED_COMMANDS = {"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"}
+
+# Values kept verbatim when shaping: structural, never user data
+STRUCTURAL_KEYS = {"$sort", "sort", "from", "localField", "foreignField", "as", "projection"}
+
+# Driver-added fields that must not be sent back inside an explain
+DRIVER_FIELDS = {"lsid", "txnNumber", "apiVersion", "apiStrict", "apiDeprecationErrors", "$db",
+                 "$clusterTime", "$readPreference", "cursor"}
+
+def shape_of(value):
+    """
+    Replace literal values with "?" while keeping field names and operators
+
+    Lists collapse to their distinct element shapes, so `$in` lists of any
+    length produce the same shape.
+    """
+    if isinstance(value, dict):
+        return {
+            key: (item if key in STRUCTURAL_KEYS else shape_of(item))
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shaped = shape_of(item)
+            if shaped not in shapes:
+                shapes.append(shaped)
+        return shapes
+    return "?"
+
+def command_shape(command_name: str, command: dict) -> dict:
+    """Literal-free description of the part of a command that picks documents"""
+    if command_name == "find":
+        return {"filter": shape_of(command.get("filter", {})), "sort": command.get("sort")}
+    if command_name == "aggregate":
+        # Shape each stage individually; stages are not collapsed like lists
+        return {"pipeline": [shape_of(stage) for stage in command.get("pipeline", [])]}
+    if command_name in ("count", "distinct"):
+        return {"query": shape_of(command.get("query", {}))}
+    if command_name == "update":
+        return {"q": shape_of([u.get("q", {}) for u in command.get("updates", [])])}
+    if command_name == "delete":
+        return {"q": shape_of([d.get("q", {}) for d in command.get("deletes", [])])}
+    if command_name == "findAndModify":
+        return {"query": shape_of(command.get("query", {})), "sort": command.get("sort")}
+    return {}
+
+def _explainable(command_name: str, command: dict) -> dict:
+    """Copy of a command suitable for wrapping in `explain`"""
+    explainable = {key: value for key, value in command.items() if key not in DRIVER_FIELDS}
+    if command_name == "aggregate":
+        explainable["cursor"] = {}
+    # explain only accepts a single update/delete statement
+    if command_name == "update":
+        explainable["updates"] = command.get("updates", [])[:1]
+    if command_name == "delete":
+        explainable["deletes"] = command.get("deletes", [])[:1]
+    return explainable
+
+def _find_winning_plan(explain) -> Optional[dict]:
+    """Locate the winning plan in find/aggregate explain output"""
+    if isinstance(explain, dict):
+        if "winningPlan" in explain:
+            return explain["winningPlan"]
+        for value in explain.values():
+            found = _find_winning_plan(value)
+            if found is not None:
+                return found
+    elif isinstance(explain, list):
+        for item in explain:
+            found = _find_winning_plan(item)
+            if found is not None:
+                return found
+    return None
+
+def summarize_plan(plan: dict) -> str:
+    """Condense a plan tree to e.g. "FETCH > IXSCAN(type_1_created_at_-1__id_-1)" """
+    stages = []
+    while isinstance(plan, dict):
+        # SBE plans nest the classic tree under queryPlan
+        plan = plan.get("queryPlan", plan)
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage}({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " > ".join(stages)
+
+
+class SlowQueryRecorder(monitoring.CommandListener):
+    """
+    Command listener that records commands slower than a threshold
+
+    Keeps a bounded ring buffer of recent slow commands and per-shape
+    aggregates (count, total and max time). The first time a shape is seen
+    its winning plan is captured with `explain` in the background.
+    """
+
+    def __init__(self, threshold_ms: float, buffer_size: int, max_shapes: int, explain: bool = True):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.max_shapes = max_shapes
+        self._recent = deque(maxlen=buffer_size)
+        self._shapes: OrderedDict[str, dict] = OrderedDict()
+        # (connection_id, request_id) -> started command details
+        self._started = {}
+        self._client = None
+        self._tasks = set()
+
+    def attach(self, client):
+        """Client used to run explain for new shapes"""
+        self._client = client
+
+    def started(self, event):
+        if event.command_name not in RECORDED_COMMANDS:
+            return
+        self._started[(event.connection_id, event.request_id)] = (
+            event.database_name, event.command
+        )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+        database_name, command = started
+        self.record(database_name, event.command_name, command, duration_ms, failed)
+
+    def record(self, database_name: str, command_name: str, command: dict,
+               duration_ms: float, failed: bool = False):
+        """Add one slow command to the ring buffer and its shape's totals"""
+        collection = command.get(command_name)
+        collection = collection if isinstance(collection, str) else "-"
+        shape = command_shape(command_name, command)
+        key = json.dumps([database_name, collection, command_name, shape], sort_keys=True, default=str)
+        now = datetime.utcnow()
+
+        stats = self._shapes.get(key)
+        if stats is None:
+            stats = {
+                "database": database_name,
+                "collection": collection,
+                "command": command_name,
+                "shape": shape,
+                "count": 0,
+                "failures": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "first_seen": now,
+                "last_seen": now,
+                "plan": None,
+                "collscan": None,
+            }
+            self._shapes[key] = stats
+            if len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+            if self.explain:
+                self._schedule_explain(stats, database_name, command_name, command)
+        else:
+            self._shapes.move_to_end(key)
+
+        stats["count"] += 1
+        stats["failures"] += int(failed)
+        stats["total_ms"] += duration_ms
+        stats["max_ms"] = max(stats["max_ms"], duration_ms)
+        stats["last_seen"] = now
+
+        self._recent.append({
+            "at": now,
+            "database": database_name,
+            "collection": collection,
+            "command": command_name,
+            "duration_ms": round(duration_ms, 2),
+            "failed": failed,
+            "shape": shape,
+        })
+
+    def _schedule_explain(self, stats: dict, database_name: str, command_name: str, command: dict):
+        if self._client is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        stats["plan"] = "pending"
+        task = loop.create_task(self._capture_plan(stats, database_name, command_name, command))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _capture_plan(self, stats: dict, database_name: str, command_name: str, command: dict):
+        try:
+            explain = await self._client[database_name].command(
+                {"explain": _explainable(command_name, command), "verbosity": "queryPlanner"}
+            )
+            plan = _find_winning_plan(explain)
+            stats["plan"] = summarize_plan(plan) if plan else "unknown"
+            stats["collscan"] = "COLLSCAN" in stats["plan"]
+        except Exception as e:
+            stats["plan"] = f"explain failed: {e}"
+
+    def worst_shapes(self, limit: int = 20) -> list:
+        """Query shapes ordered by total time spent, slowest first"""
+        shapes = sorted(self._shapes.values(), key=lambda s: s["total_ms"], reverse=True)
+        return [
+            {**s, "total_ms": round(s["total_ms"], 2), "max_ms": round(s["max_ms"], 2),
+             "avg_ms": round(s["total_ms"] / s["count"], 2)}
+            for s in shapes[:limit]
+        ]
+
+    def recent(self, limit: int = 50) -> list:
+        """Most recent slow commands, newest first"""
+        return list(reversed(self._recent))[:limit]
+
+    def clear(self):
+        self._recent.clear()
+        self._shapes.clear()
+
+
+slow_query_recorder = SlowQueryRecorder(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    buffer_size=settings.SLOW_QUERY_BUFFER_SIZE,
+    max_shapes=settings.SLOW_QUERY_MAX_SHAPES,
+    explain=settings.SLOW_QUERY_EXPLAIN
+)
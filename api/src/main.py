@@ -1,14 +1,100 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
+from fastapi.staticfiles import StaticFiles
+
+from .db.db_config import get_database, close_client, test_connection, warm_up_pool
+from .db.indexes import init_db
+from .routes import admin, auth, ngo, pets
+from .utils.admission import AdmissionMiddleware, loop_lag_monitor
+from .utils.config import settings
+from .utils.image_queue import image_queue
+from .utils.metrics import MetricsMiddleware, mark_worker_exited, render_metrics
+from .utils.revocation import revocation_list
+from .utils.security import check_session_settings
+from .utils.worker_state import drain_on_sigterm, worker_state
 
-# Load environment variables from .env file
-load_dotenv()
+async def _startup_task(name: str, coro):
+    """Run a non-critical startup step without failing the app"""
+    try:
+        await coro
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Warning: startup task '{name}' failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start and stop background services
+    
+    Nothing here waits on MongoDB by default: the pool warm-up and index
+    sync run as background tasks (see STARTUP_INDEX_MODE).
+    """
+    check_session_settings()
+    
+    background = []
+    warm_up = None
+    
+    if settings.MONGODB_WARMUP_CONNECTIONS > 0:
+        warm_up = asyncio.create_task(_startup_task(
+            "pool warm-up", warm_up_pool(settings.MONGODB_WARMUP_CONNECTIONS)
+        ))
+        background.append(warm_up)
+    
+    if settings.STARTUP_INDEX_MODE == "blocking":
+        if await test_connection():
+            await init_db()
+        else:
+            print("Warning: Could not connect to MongoDB!")
+    elif settings.STARTUP_INDEX_MODE == "background":
+        background.append(asyncio.create_task(_startup_task("index sync", init_db())))
+    
+    if settings.IMAGE_UPLOAD_MODE == "async":
+        await image_queue.start(get_database())
+    
+    # Revocations cover signed tokens and principal-cached Mongo sessions
+    if settings.SESSION_SIGNING_SECRET or settings.AUTH_CACHE_MAX_ENTRIES > 0:
+        await revocation_list.start(get_database())
+    
+    if settings.ADMISSION_CONTROL_ENABLED:
+        await loop_lag_monitor.start()
+    
+    app.state.startup_tasks = background
+    
+    # This worker reports ready once its pool warm-up has been attempted
+    if warm_up:
+        warm_up.add_done_callback(lambda _: worker_state.mark_ready())
+    else:
+        worker_state.mark_ready()
+    
+    # On SIGTERM, fail readiness first and keep serving for SHUTDOWN_DRAIN_SECONDS
+    restore_sigterm = drain_on_sigterm(settings.SHUTDOWN_DRAIN_SECONDS)
+    
+    yield
+    
+    # The server has stopped accepting and finished in-flight requests
+    restore_sigterm()
+    worker_state.mark_draining()
+    
+    # Stop background workers
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await image_queue.stop()
+    await revocation_list.stop()
+    await loop_lag_monitor.stop()
+    await close_client()
+    mark_worker_exited()
 
-from .db.db_config import init_db, test_connection
-from .routes import auth, ngo, pets
+app = FastAPI(title="Pets & Paws API", lifespan=lifespan)
 
-app = FastAPI(title="Pets & Paws API")
+# Rate limits and load shedding (inside CORS, so rejections carry CORS headers)
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionMiddleware)
 
 # CORS setup
 app.add_middleware(
@@ -19,14 +105,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Startup Event
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    if test_connection():
-        init_db()
-    else:
-        print("Warning: Could not connect to MongoDB!")
+# Request metrics (outermost, so CORS and routing time is included)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Health Check
 @app.get("/")
@@ -34,11 +115,40 @@ async def root():
     """Health check endpoint"""
     return {"status": "ok", "message": "Pets & Paws API is running"}
 
+# Per-worker readiness probe
+@app.get("/health/ready")
+async def readiness():
+    """Readiness of the worker serving this request (503 while starting or draining)"""
+    return JSONResponse(
+        worker_state.describe(),
+        status_code=200 if worker_state.is_ready else 503
+    )
+
+# Prometheus scrape endpoint
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics"""
+        body, content_type = render_metrics()
+        return Response(content=body, media_type=content_type)
+
 # Include Routers
 app.include_router(auth.router)
 app.include_router(ngo.router)
 app.include_router(pets.router)
+app.include_router(admin.router)
+
+# Serve images stored by the local (offline) upload backend
+if settings.IMAGE_UPLOAD_BACKEND == "local":
+    app.mount("/media", StaticFiles(directory=settings.IMAGE_LOCAL_DIR, check_dir=False), name="media")
 
+# Single process (development); use `python -m src.serve` for multiple workers
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        app,
+        host=settings.API_HOST,
+        port=settings.API_PORT,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.TRUSTED_PROXIES
+    )
\ No newline at end of file
@@ -1,3 +1,3 @@
-from . import auth, ngo, pets
+from . import admin, auth, ngo, pets
 
-__all__ = ["auth", "ngo", "pets"]
\ No newline at end of file
+__all__ = ["admin", "auth", "ngo", "pets"]
\ No newline at end of file
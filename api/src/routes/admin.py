@@ -0,0 +1,42 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+
+from ..db.slow_queries import slow_query_recorder
+from ..utils.config import settings
+from ..utils.responses import ORJSONResponse
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"])
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Dependency guarding operator endpoints with ADMIN_API_KEY"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
+    
+    # Compare bytes: compare_digest rejects non-ASCII str arguments
+    if not x_admin_key or not hmac.compare_digest(x_admin_key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
+@router.get("/slow-queries", response_class=ORJSONResponse, dependencies=[Depends(require_admin)])
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    recent: int = Query(20, ge=0, le=500)
+):
+    """
+    Worst query shapes by total time, plus the most recent slow commands
+    
+    Shapes carry field names and operators only (literal values are
+    replaced with "?") and the winning plan captured on first sight.
+    """
+    return ORJSONResponse({
+        "threshold_ms": slow_query_recorder.threshold_ms,
+        "shapes": slow_query_recorder.worst_shapes(limit),
+        "recent": slow_query_recorder.recent(recent)
+    })
+
+@router.delete("/slow-queries", dependencies=[Depends(require_admin)])
+async def clear_slow_queries():
+    """Reset recorded slow queries"""
+    slow_query_recorder.clear()
+    return {"message": "Slow-query log cleared"}
@@ -1,46 +1,87 @@
 from fastapi import APIRouter, HTTPException, Depends, Header
 from typing import Optional
 from datetime import datetime
-from bson import ObjectId
 
 from ..db.db_config import get_database
 from ..db.models import SignupRequest, LoginRequest, AuthResponse, UserResponse
-from ..utils.security import hash_password, create_session
+from ..db.serializers import USER_PROJECTION
+from ..utils.security import hash_password, create_session, is_signed_token, verify_signed_token
+from ..utils.auth_cache import principal_cache
+from ..utils.revocation import revocation_list, session_token_id, epoch_seconds
 
 router = APIRouter(prefix="/api", tags=["Authentication"])
 
-def get_current_user(authorization: Optional[str] = Header(None)):
+async def get_current_user(authorization: Optional[str] = Header(None)):
     """Dependency to get current user from token"""
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     token = authorization.split(" ")[1]
-    db = get_database()
     
-    # Find session
-    session = db.sessions.find_one({
-        "token": token,
-        "expires_at": {"$gt": datetime.utcnow()}
-    })
+    # Signed tokens are verified in-process
+    if is_signed_token(token):
+        claims = verify_signed_token(token)
+        if not claims or revocation_list.is_revoked(claims["jti"]):
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        return {
+            "id": claims["uid"],
+            "email": claims["email"],
+            "name": claims["name"],
+            "user_type": claims["typ"]
+        }
+    
+    # Serve warm tokens without touching the database, unless another
+    # worker has since logged the session out
+    cached = principal_cache.get(token)
+    if cached:
+        if not revocation_list.is_revoked(session_token_id(token)):
+            return cached
+        principal_cache.evict(token)
     
-    if not session:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    db = get_database()
     
-    # Find user - Convert user_id string back to ObjectId
-    try:
-        user = db.users.find_one({"_id": ObjectId(session["user_id"])})
-    except:
-        user = db.users.find_one({"_id": session["user_id"]})
+    # Find session and its user in a single round trip
+    results = await (await db.sessions.aggregate([
+        {"$match": {"token": token, "expires_at": {"$gt": datetime.utcnow()}}},
+        {"$limit": 1},
+        # Sessions store user_id as a string; convert it back to ObjectId
+        {"$addFields": {
+            "user_oid": {
+                "$convert": {"input": "$user_id", "to": "objectId", "onError": "$user_id"}
+            }
+        }},
+        {"$lookup": {
+            "from": "users",
+            "localField": "user_oid",
+            "foreignField": "_id",
+            "as": "user"
+        }},
+        {"$project": {
+            "expires_at": 1,
+            "user._id": 1,
+            "user.email": 1,
+            "user.name": 1,
+            "user.user_type": 1
+        }}
+    ])).to_list()
+    
+    if not results:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    if not user:
+    session = results[0]
+    if not session["user"]:
         raise HTTPException(status_code=401, detail="User not found")
     
-    return {
+    user = session["user"][0]
+    current_user = {
         "id": str(user["_id"]),
         "email": user["email"],
         "name": user["name"],
         "user_type": user["user_type"]
     }
+    principal_cache.set(token, current_user, session["expires_at"])
+    
+    return current_user
 
 @router.post("/signup", response_model=AuthResponse)
 async def signup(request: SignupRequest):
@@ -48,7 +89,7 @@ async def signup(request: SignupRequest):
     db = get_database()
     
     # Check if user exists
-    existing = db.users.find_one({"email": request.email})
+    existing = await db.users.find_one({"email": request.email}, {"_id": 1})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -62,23 +103,23 @@ async def signup(request: SignupRequest):
         "created_at": datetime.utcnow()
     }
     
-    result = db.users.insert_one(user_doc)
-    user_id = str(result.inserted_id)
+    result = await db.users.insert_one(user_doc)
+    user = UserResponse(
+        id=str(result.inserted_id),
+        email=request.email,
+        name=request.name,
+        user_type=request.user_type
+    )
     
     # Create session
-    token = create_session(user_id)
+    token = await create_session(db, user.model_dump())
     
     # Determine redirect URL based on user type
     redirect_url = "/ngo/dashboard" if request.user_type == "NGO" else "/"
     
     return AuthResponse(
         token=token,
-        user=UserResponse(
-            id=user_id,
-            email=request.email,
-            name=request.name,
-            user_type=request.user_type
-        ),
+        user=user,
         redirect_url=redirect_url
     )
 
@@ -88,30 +129,30 @@ async def login(request: LoginRequest):
     db = get_database()
     
     password_hash = hash_password(request.password)
-    user = db.users.find_one({
+    user = await db.users.find_one({
         "email": request.email,
         "password_hash": password_hash
-    })
+    }, USER_PROJECTION)
     
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    user_id = str(user["_id"])
+    user = UserResponse(
+        id=str(user["_id"]),
+        email=user["email"],
+        name=user["name"],
+        user_type=user["user_type"]
+    )
     
     # Create session
-    token = create_session(user_id)
+    token = await create_session(db, user.model_dump())
     
     # Determine redirect URL based on user type
-    redirect_url = "/ngo/dashboard" if user["user_type"] == "NGO" else "/"
+    redirect_url = "/ngo/dashboard" if user.user_type == "NGO" else "/"
     
     return AuthResponse(
         token=token,
-        user=UserResponse(
-            id=user_id,
-            email=user["email"],
-            name=user["name"],
-            user_type=user["user_type"]
-        ),
+        user=user,
         redirect_url=redirect_url
     )
 
@@ -122,13 +163,24 @@ async def get_me(current_user = Depends(get_current_user)):
 
 @router.post("/logout")
 async def logout(authorization: Optional[str] = Header(None)):
-    """Logout user (delete session)"""
+    """Logout user (delete session, or revoke a signed token)"""
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     token = authorization.split(" ")[1]
     db = get_database()
     
-    db.sessions.delete_one({"token": token})
+    if is_signed_token(token):
+        claims = verify_signed_token(token)
+        if claims:
+            await revocation_list.revoke(db, claims["jti"], claims["exp"])
+        return {"message": "Logged out successfully"}
+    
+    principal_cache.evict(token)
+    session = await db.sessions.find_one_and_delete({"token": token}, {"expires_at": 1})
+    
+    # Other workers may have this session cached; tell them it is gone
+    if session and principal_cache.max_entries > 0:
+        await revocation_list.revoke(db, session_token_id(token), epoch_seconds(session["expires_at"]))
     
     return {"message": "Logged out successfully"}
\ No newline at end of file
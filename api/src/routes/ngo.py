@@ -1,35 +1,33 @@
 from fastapi import APIRouter, HTTPException, Depends
 
 from ..db.db_config import get_database
+from ..db.ngo_stats import get_ngo_stats
+from ..utils.responses import ORJSONResponse
 from .auth import get_current_user
 
 router = APIRouter(prefix="/api/ngo", tags=["NGO"])
 
-@router.get("/dashboard")
+@router.get("/dashboard", response_class=ORJSONResponse)
 async def get_ngo_dashboard(current_user = Depends(get_current_user)):
     """Get NGO dashboard data (requires NGO user)"""
     # Verify user is an NGO
     if current_user["user_type"] != "NGO":
         raise HTTPException(status_code=403, detail="Access denied. NGO users only.")
     
-    db = get_database()
+    # One point read of the incrementally maintained ngo_stats document
+    stats = await get_ngo_stats(get_database(), current_user["id"])
     
-    # Get NGO's pets count
-    pets_count = db.pets.count_documents({"ngo_user_id": current_user["id"]})
-    
-    # Get NGO's pets
-    pets = list(db.pets.find({"ngo_user_id": current_user["id"]}).limit(10))
-    
-    # Convert ObjectId to string for JSON serialization
-    for pet in pets:
-        pet["_id"] = str(pet["_id"])
-    
-    return {
+    # ObjectIds and datetimes are encoded directly by orjson
+    return ORJSONResponse({
         "user": current_user,
         "stats": {
-            "total_pets": pets_count,
-            "active_pets": pets_count,  # Can be updated later
+            "total_pets": stats["total_pets"],
+            "active_pets": stats["by_listing_state"].get("ready", 0),
+            "vaccinated": stats["vaccinated"],
+            "neutered": stats["neutered"],
+            "by_type": stats["by_type"],
+            "by_listing_state": stats["by_listing_state"],
         },
-        "recent_pets": pets,
+        "recent_pets": stats["recent_pets"],
         "message": "Welcome to your NGO dashboard!"
-    }
\ No newline at end of file
+    })
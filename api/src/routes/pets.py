@@ -1,15 +1,84 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from typing import Optional
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional, Literal
 from datetime import datetime
 from bson import ObjectId
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
 
 from ..db.db_config import get_database
-from ..db.models import PetRequest, PetResponse
+from ..db.models import PetRequest, PetResponse, PetImportRow
+from ..db.serializers import PET_PROJECTION, NGO_PUBLIC_PROJECTION
+from ..db.ngo_summary import build_ngo_summary
+from ..db.catalog_version import CatalogSnapshot, catalog_snapshot, bump_catalog_version
+from ..db.counts import count_cache, count_documents_cached, find_with_total
+from ..db.facets import facet_cache, age_bucket_filter, search_with_facets
+from ..db.ngo_stats import record_pets_created
 from .auth import get_current_user
-from ..utils.cloudinary_upload import upload_image_to_cloudinary
+from ..utils.cloudinary_upload import upload_bytes_to_cloudinary, read_image_upload, validate_image
+from ..utils.image_processing import upload_image_deduplicated, verify_image
+from ..utils.image_queue import image_queue, stage_image
+from ..utils.import_manifest import parse_manifest, collect_images
+from ..utils.config import settings
+from ..utils.export import EXPORT_SORT, MEDIA_TYPES, normalize_since, stream_export
+from ..utils.geo import MAX_LOCATION_LENGTH, geo_point, parse_near, within_radius, geo_near_stage
+from ..utils.http_cache import make_etag, etag_matches, not_modified
+from ..utils.location import tokenize_location, location_query
+from ..utils.pagination import PET_SORT, encode_cursor, keyset_filter
+from ..utils.responses import ORJSONResponse
 
 router = APIRouter(prefix="/api/pets", tags=["Pets"])
 
+PET_IMAGE_FOLDER = "pets_paws/pets"
+
+async def _store_image(db, image_content: bytes, content_type: Optional[str]) -> tuple[str, str, Optional[str]]:
+    """Upload or stage a validated image; returns (image_url, image_status, staging_path)"""
+    if settings.IMAGE_UPLOAD_MODE == "async":
+        # Reject unreadable images now; the worker could only mark them failed
+        await asyncio.to_thread(verify_image, image_content)
+        # Stage the image locally; a background worker uploads it
+        staging_path = await stage_image(image_content, content_type)
+        return "", "pending", staging_path
+    
+    # Downscale locally and upload to Cloudinary (reusing identical uploads)
+    image_url = await upload_image_deduplicated(
+        db, image_content, PET_IMAGE_FOLDER, upload_bytes_to_cloudinary
+    )
+    return image_url, "ready", None
+
+def _build_pet_document(
+    current_user: dict,
+    pet: dict,
+    image_url: str,
+    image_status: str,
+    staging_path: Optional[str] = None
+) -> dict:
+    """Pet document as stored in Mongo"""
+    pet_doc = {
+        "ngo_user_id": current_user["id"],
+        "name": pet["name"],
+        "type": pet["type"],
+        "age": pet["age"],
+        "location": pet["location"],
+        "location_tokens": tokenize_location(pet["location"]),
+        "geo": geo_point(pet["location"]),
+        "image_url": image_url,
+        "image_status": image_status,
+        "vaccinated": pet["vaccinated"],
+        "neutered": pet["neutered"],
+        "medical_notes": pet.get("medical_notes"),
+        "ngo": build_ngo_summary(current_user),
+        "version": 1,
+        "created_at": datetime.utcnow()
+    }
+    
+    if staging_path:
+        pet_doc["image_staging_path"] = staging_path
+        pet_doc["image_folder"] = PET_IMAGE_FOLDER
+    
+    return pet_doc
+
 @router.post("", response_model=PetResponse)
 async def create_pet(
     name: str = Form(...),
@@ -31,26 +100,35 @@ async def create_pet(
     if type not in ["Dog", "Cat"]:
         raise HTTPException(status_code=400, detail="Pet type must be 'Dog' or 'Cat'")
     
-    # Upload image to Cloudinary
-    image_url = await upload_image_to_cloudinary(image, folder="pets_paws/pets")
-    
     db = get_database()
+    image_content = await read_image_upload(image)
+    image_url, image_status, staging_path = await _store_image(db, image_content, image.content_type)
     
     # Create pet document
-    pet_doc = {
-        "ngo_user_id": current_user["id"],
-        "name": name,
-        "type": type,
-        "age": age,
-        "location": location,
-        "image_url": image_url,
-        "vaccinated": vaccinated,
-        "neutered": neutered,
-        "medical_notes": medical_notes,
-        "created_at": datetime.utcnow()
-    }
+    pet_doc = _build_pet_document(
+        current_user,
+        {
+            "name": name,
+            "type": type,
+            "age": age,
+            "location": location,
+            "vaccinated": vaccinated,
+            "neutered": neutered,
+            "medical_notes": medical_notes
+        },
+        image_url,
+        image_status,
+        staging_path
+    )
     
-    result = db.pets.insert_one(pet_doc)
+    result = await db.pets.insert_one(pet_doc)
+    count_cache.invalidate("pets")
+    facet_cache.invalidate("pets")
+    await bump_catalog_version(db)
+    await record_pets_created(db, current_user["id"], [pet_doc])
+    
+    if staging_path:
+        await image_queue.enqueue(str(result.inserted_id), staging_path, PET_IMAGE_FOLDER)
     
     return PetResponse(
         id=str(result.inserted_id),
@@ -60,68 +138,382 @@ async def create_pet(
         age=age,
         location=location,
         image_url=image_url,
+        image_status=image_status,
         vaccinated=vaccinated,
         neutered=neutered,
         medical_notes=medical_notes,
-        created_at=pet_doc["created_at"].isoformat()
+        created_at=pet_doc["created_at"].isoformat(),
+        ngo=pet_doc["ngo"]
     )
 
-@router.get("")
+@router.post("/import")
+async def import_pets(
+    manifest: UploadFile = File(...),
+    images: list[UploadFile] = File(default=[]),
+    images_archive: Optional[UploadFile] = File(None),
+    current_user = Depends(get_current_user)
+):
+    """
+    Bulk-create pets from a CSV/JSON manifest (NGO only)
+    
+    Each row carries the PetRequest fields plus either `image` (the file
+    name of an uploaded image, sent in `images` or inside the
+    `images_archive` zip) or a ready `image_url`. Rows are validated
+    individually, images are uploaded with bounded concurrency (once per
+    file name), and pets are written with batched insert_many. The
+    response reports the outcome of every row.
+    """
+    if current_user["user_type"] != "NGO":
+        raise HTTPException(status_code=403, detail="Only NGOs can add pets")
+    
+    rows = parse_manifest(await manifest.read(), manifest.filename, manifest.content_type)
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Manifest exceeds {settings.BULK_IMPORT_MAX_ROWS} rows"
+        )
+    
+    image_loaders = collect_images(images, images_archive)
+    db = get_database()
+    results: list[Optional[dict]] = [None] * len(rows)
+    
+    # Validate every row against the pet schema
+    valid_rows = []
+    for index, row in enumerate(rows):
+        try:
+            pet = PetImportRow.model_validate(row)
+        except ValidationError as e:
+            results[index] = {
+                "row": index + 1,
+                "status": "error",
+                "errors": [
+                    f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+                    for err in e.errors()
+                ]
+            }
+            continue
+        
+        if pet.image and pet.image not in image_loaders:
+            results[index] = {
+                "row": index + 1,
+                "status": "error",
+                "errors": [f"image: '{pet.image}' was not uploaded"]
+            }
+            continue
+        
+        valid_rows.append((index, pet))
+    
+    # Upload each referenced image once, with bounded concurrency
+    semaphore = asyncio.Semaphore(settings.BULK_IMPORT_UPLOAD_CONCURRENCY)
+    
+    async def store(image_name: str):
+        async with semaphore:
+            content_type, content = await image_loaders[image_name]()
+            validate_image(content_type, content)
+            return await _store_image(db, content, content_type)
+    
+    image_names = sorted({pet.image for _, pet in valid_rows if pet.image})
+    stored = await asyncio.gather(*(store(name) for name in image_names), return_exceptions=True)
+    stored_images = dict(zip(image_names, stored))
+    
+    # Build documents for rows whose image is available
+    pending = []
+    for index, pet in valid_rows:
+        if pet.image:
+            outcome = stored_images[pet.image]
+            if isinstance(outcome, BaseException):
+                results[index] = {
+                    "row": index + 1,
+                    "status": "error",
+                    "errors": [f"image: {getattr(outcome, 'detail', None) or outcome}"]
+                }
+                continue
+            image_url, image_status, staging_path = outcome
+        else:
+            image_url, image_status, staging_path = pet.image_url, "ready", None
+        
+        pet_doc = _build_pet_document(current_user, pet.model_dump(), image_url, image_status, staging_path)
+        pending.append((index, pet_doc))
+    
+    # Write in batches; with ordered=False one bad document doesn't stop the batch
+    for start in range(0, len(pending), settings.BULK_IMPORT_BATCH_SIZE):
+        batch = pending[start:start + settings.BULK_IMPORT_BATCH_SIZE]
+        failed = {}
+        try:
+            await db.pets.insert_many([pet_doc for _, pet_doc in batch], ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"]: error.get("errmsg", "write failed") for error in e.details["writeErrors"]}
+        
+        inserted = []
+        for position, (index, pet_doc) in enumerate(batch):
+            if position in failed:
+                results[index] = {"row": index + 1, "status": "error", "errors": [failed[position]]}
+                continue
+            
+            inserted.append(pet_doc)
+            results[index] = {"row": index + 1, "status": "created", "id": str(pet_doc["_id"])}
+            if pet_doc.get("image_staging_path"):
+                await image_queue.enqueue(str(pet_doc["_id"]), pet_doc["image_staging_path"], PET_IMAGE_FOLDER)
+        
+        await record_pets_created(db, current_user["id"], inserted)
+    
+    created = sum(1 for result in results if result["status"] == "created")
+    if created:
+        count_cache.invalidate("pets")
+        facet_cache.invalidate("pets")
+        await bump_catalog_version(db)
+    
+    return {
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }
+
+@router.get("", response_class=ORJSONResponse)
 async def get_pets(
+    request: Request,
     type: Optional[str] = None,
     location: Optional[str] = None,
     limit: int = 20,
-    skip: int = 0
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    location_mode: Literal["prefix", "token", "contains"] = "prefix",
+    near: Optional[str] = Query(None, max_length=MAX_LOCATION_LENGTH),
+    radius_km: float = Query(settings.NEAR_DEFAULT_RADIUS_KM, gt=0, le=settings.NEAR_MAX_RADIUS_KM),
+    include_total: bool = True,
+    exact_total: bool = False,
+    if_none_match: Optional[str] = Header(None),
+    snapshot: CatalogSnapshot = Depends(catalog_snapshot)
 ):
-    """Get list of available pets for adoption (public endpoint)"""
-    db = get_database()
+    """
+    Get list of available pets for adoption (public endpoint)
+    
+    Pages are ordered newest first. Pass the returned `next_cursor` as
+    `cursor` to fetch the following page; `skip` is kept only for legacy
+    clients and gets slower the deeper it pages.
+    
+    `location` matches word prefixes by default (e.g. "new yo" finds
+    "New York, NY"); `location_mode=token` requires whole words and
+    `location_mode=contains` keeps the old unindexed substring search.
+    
+    `near` ("lat,lon" or a place name such as "Pune") returns pets within
+    `radius_km` of that point, nearest first, each with its `distance_km`.
+    Distance-ordered pages are fetched with `skip` (no `next_cursor`).
+    
+    `total` comes from a short-lived count cache by default. Use
+    `exact_total=true` to fetch the page and an exact count in one
+    aggregation, or `include_total=false` to skip counting entirely.
+    
+    Responses carry an ETag tied to the catalog version, so a matching
+    `If-None-Match` is answered with 304 before any pets are read.
+    """
+    # Public browsing may be served by a secondary (CATALOG_READ_PREFERENCE);
+    # reads in the snapshot's session are at least as new as its version
+    db, session = snapshot.db, snapshot.session
+    
+    etag = make_etag("pets", snapshot.version, sorted(request.query_params.multi_items()))
+    cache_control = settings.PETS_LIST_CACHE_CONTROL
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cache_control)
     
     # Build query filter
     query = {}
     if type:
         query["type"] = type
     if location:
-        query["location"] = {"$regex": location, "$options": "i"}  # Case-insensitive search
+        query.update(location_query(location, location_mode))
+    
+    if near:
+        point = parse_near(near)
+        if point is None:
+            raise HTTPException(status_code=400, detail=f"Unknown location for near: '{near}'")
+        
+        # $geoNear must be the first stage; its output is already nearest first
+        pets = []
+        if limit > 0:
+            pets = await (await db.pets.aggregate([
+                geo_near_stage(point, radius_km, query),
+                {"$skip": skip},
+                {"$limit": limit},
+                {"$project": {**PET_PROJECTION, "distance_km": 1}}
+            ], session=session)).to_list()
+        
+        # $near/$geoNear are not allowed in counts; $geoWithin covers the same circle
+        total = None
+        if include_total:
+            total = await count_documents_cached(
+                db.pets, {**query, **within_radius(point, radius_km)}, session, snapshot.version
+            )
+        
+        return ORJSONResponse({
+            "pets": pets,
+            "total": total,
+            "page": skip // limit + 1 if limit > 0 else 1,
+            "limit": limit,
+            "next_cursor": None
+        }, headers={"ETag": etag, "Cache-Control": cache_control})
+    
+    # Keyset pagination when a cursor is given, otherwise legacy skip
+    page_filter = keyset_filter(cursor)
+    if page_filter:
+        skip = 0
+    page_query = {**query, **page_filter}
     
     # Get pets with pagination
-    pets = list(db.pets.find(query).skip(skip).limit(limit))
-    total = db.pets.count_documents(query)
+    if include_total and exact_total:
+        pets, total = await find_with_total(
+            db.pets, query, page_filter, PET_SORT, skip, limit, PET_PROJECTION, session,
+            snapshot.version
+        )
+    else:
+        pets = await db.pets.find(
+            page_query, PET_PROJECTION, session=session
+        ).sort(PET_SORT).skip(skip).limit(limit).to_list()
+        total = await count_documents_cached(
+            db.pets, query, session, snapshot.version
+        ) if include_total else None
     
-    # Convert ObjectId to string
-    for pet in pets:
-        pet["_id"] = str(pet["_id"])
+    next_cursor = encode_cursor(pets[-1]) if limit > 0 and len(pets) == limit else None
     
-    return {
+    # ObjectIds and datetimes are encoded directly by orjson
+    return ORJSONResponse({
         "pets": pets,
         "total": total,
         "page": skip // limit + 1 if limit > 0 else 1,
-        "limit": limit
-    }
+        "limit": limit,
+        "next_cursor": next_cursor
+    }, headers={"ETag": etag, "Cache-Control": cache_control})
 
-@router.get("/{pet_id}")
-async def get_pet_details(pet_id: str):
+@router.get("/search", response_class=ORJSONResponse)
+async def search_pets(
+    request: Request,
+    type: Optional[str] = None,
+    vaccinated: Optional[bool] = None,
+    neutered: Optional[bool] = None,
+    age_bucket: Optional[Literal["<1", "1-2", "3-6", "7-10", "11+"]] = None,
+    location: Optional[str] = None,
+    location_mode: Literal["prefix", "token", "contains"] = "prefix",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    snapshot: CatalogSnapshot = Depends(catalog_snapshot)
+):
+    """
+    Faceted pet search (public endpoint)
+    
+    Returns a page of matching pets (newest first, continue with
+    `next_cursor`) together with counts per type, vaccinated, neutered,
+    age bucket and top locations for the same filters, all from one
+    aggregation. Facet counts are briefly cached per filter.
+    """
+    # Public browsing may be served by a secondary (CATALOG_READ_PREFERENCE);
+    # reads in the snapshot's session are at least as new as its version
+    db, session = snapshot.db, snapshot.session
+    
+    etag = make_etag("pets-search", snapshot.version, sorted(request.query_params.multi_items()))
+    cache_control = settings.PETS_LIST_CACHE_CONTROL
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cache_control)
+    
+    # Build query filter
+    query = {}
+    if type:
+        query["type"] = type
+    if vaccinated is not None:
+        query["vaccinated"] = vaccinated
+    if neutered is not None:
+        query["neutered"] = neutered
+    if age_bucket:
+        query.update(age_bucket_filter(age_bucket))
+    if location:
+        query.update(location_query(location, location_mode))
+    
+    pets, total, facets = await search_with_facets(
+        db.pets, query, keyset_filter(cursor), limit, PET_PROJECTION, session, snapshot.version
+    )
+    next_cursor = encode_cursor(pets[-1]) if len(pets) == limit else None
+    
+    # ObjectIds and datetimes are encoded directly by orjson
+    return ORJSONResponse({
+        "pets": pets,
+        "total": total,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "facets": facets
+    }, headers={"ETag": etag, "Cache-Control": cache_control})
+
+@router.get("/export")
+async def export_pets(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: Optional[datetime] = None,
+    type: Optional[str] = None
+):
+    """
+    Stream the full pet catalog as NDJSON or CSV (public endpoint)
+    
+    Pets are streamed oldest first from a server-side cursor, so memory
+    stays flat however many pets are listed. For incremental exports pass
+    `since` (ISO 8601) to get only pets created at or after that time, e.g.
+    the `created_at` of the last row of the previous export. The boundary
+    is inclusive so pets sharing that timestamp are not skipped; rows
+    already seen (usually just that last one) repeat and should be
+    de-duplicated by `id`.
+    """
+    # Public browsing may be served by a secondary (CATALOG_READ_PREFERENCE)
+    db = get_database("catalog")
+    
+    query = {}
+    if type:
+        query["type"] = type
+    since = normalize_since(since)
+    if since:
+        query["created_at"] = {"$gte": since}
+    
+    cursor = db.pets.find(query, PET_PROJECTION).sort(EXPORT_SORT).batch_size(settings.EXPORT_BATCH_SIZE)
+    
+    filename = f"pets-{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.{format}"
+    return StreamingResponse(
+        stream_export(cursor, format, settings.EXPORT_BATCH_SIZE),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/{pet_id}", response_class=ORJSONResponse)
+async def get_pet_details(pet_id: str, if_none_match: Optional[str] = Header(None)):
     """Get details of a specific pet"""
-    db = get_database()
+    db = get_database("catalog")
+    cache_control = settings.PET_DETAIL_CACHE_CONTROL
     
     try:
-        pet = db.pets.find_one({"_id": ObjectId(pet_id)})
+        pet_oid = ObjectId(pet_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid pet ID")
     
+    # Revalidation only needs the document version
+    if if_none_match:
+        current = await db.pets.find_one({"_id": pet_oid}, {"version": 1})
+        if current:
+            etag = make_etag("pet", pet_id, current.get("version", 0))
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, cache_control)
+    
+    pet = await db.pets.find_one({"_id": pet_oid}, {**PET_PROJECTION, "version": 1})
+    
     if not pet:
         raise HTTPException(status_code=404, detail="Pet not found")
     
-    # Convert ObjectId to string
-    pet["_id"] = str(pet["_id"])
+    etag = make_etag("pet", pet_id, pet.pop("version", 0))
     
-    # Get NGO details
-    try:
-        ngo = db.users.find_one({"_id": ObjectId(pet["ngo_user_id"])})
-    except:
-        ngo = None
+    # Get NGO details (embedded on the pet; older pets need a lookup)
+    ngo = pet.get("ngo")
+    if not ngo:
+        try:
+            ngo = await db.users.find_one({"_id": ObjectId(pet["ngo_user_id"])}, NGO_PUBLIC_PROJECTION)
+        except:
+            ngo = None
     
     if ngo:
         pet["ngo_name"] = ngo.get("name", "Unknown NGO")
         pet["ngo_email"] = ngo.get("email", "")
     
-    return pet
\ No newline at end of file
+    return ORJSONResponse(pet, headers={"ETag": etag, "Cache-Control": cache_control})
\ No newline at end of file
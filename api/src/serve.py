@@ -0,0 +1,73 @@
+"""
+Multi-process production server
+
+Run with: python -m src.serve
+
+Starts API_WORKERS uvicorn worker processes (one per CPU core by default)
+sharing one listening socket. Workers are spawned, not forked, and each
+builds its own MongoDB client on first use, so no connection state is
+shared between processes. On SIGTERM every worker first reports
+"draining" for SHUTDOWN_DRAIN_SECONDS while still serving, so load
+balancers stop routing to it; it then stops accepting connections,
+finishes in-flight requests for up to SHUTDOWN_GRACE_SECONDS and runs the
+app's shutdown steps. SIGINT skips the draining delay.
+
+Each worker answers GET /health/ready for itself: 503 while starting or
+draining, 200 once ready.
+
+Behind a reverse proxy, set TRUSTED_PROXIES to its address so the client
+IP (used by per-IP rate limits) is taken from X-Forwarded-For.
+"""
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from .utils.config import settings
+
+
+def worker_count() -> int:
+    """Configured number of worker processes"""
+    return settings.API_WORKERS or os.cpu_count() or 1
+
+
+def _prepare_metrics_dir(workers: int):
+    """Give workers a shared, empty directory to merge Prometheus samples"""
+    if workers <= 1 or not settings.METRICS_ENABLED:
+        return None
+
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        # Samples left by a previous run would be merged into this one
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+        return None
+
+    directory = tempfile.mkdtemp(prefix="pets_paws_metrics_")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def main():
+    workers = worker_count()
+    owned_metrics_dir = _prepare_metrics_dir(workers)
+
+    print(f"✓ Starting {workers} worker(s) on {settings.API_HOST}:{settings.API_PORT}")
+    try:
+        uvicorn.run(
+            "src.main:app",
+            host=settings.API_HOST,
+            port=settings.API_PORT,
+            workers=workers,
+            timeout_graceful_shutdown=settings.SHUTDOWN_GRACE_SECONDS,
+            proxy_headers=True,
+            forwarded_allow_ips=settings.TRUSTED_PROXIES,
+        )
+    finally:
+        if owned_metrics_dir:
+            shutil.rmtree(owned_metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,24 @@
 """
 Comprehensive API Testing Script
 Run this after starting the API server
+
+The rate limit test runs last: it uses up this client's login budget.
+The async image upload test needs no network access when the server runs
+with IMAGE_UPLOAD_MODE=async and IMAGE_UPLOAD_BACKEND=local. The signed
+token tests need SESSION_TOKEN_FORMAT=signed on the server; forging an
+expired token also needs its SESSION_SIGNING_SECRET in this environment.
 """
 
+import base64
+import hashlib
+import hmac
+import io
+import os
+import time
 import requests
 import json
 from datetime import datetime
+from PIL import Image
 
 # API Base URL
 BASE_URL = "http://localhost:8000"
@@ -198,8 +211,117 @@ def test_unauthorized_access():
         print_error(f"Unauthorized access test failed: {e}")
         return False
 
+def _login_token() -> str:
+    """A fresh session token for the test NGO"""
+    response = requests.post(
+        f"{BASE_URL}/api/login",
+        json={
+            "email": test_ngo_user["email"],
+            "password": test_ngo_user["password"]
+        }
+    )
+    assert response.status_code == 200
+    return response.json()['token']
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+def _sign_token(claims: dict, secret: str) -> str:
+    """Build a signed token ("st1.<payload>.<signature>") as the server does"""
+    message = "st1." + _b64(json.dumps(claims, separators=(",", ":")).encode())
+    signature = hmac.new(secret.encode(), message.encode(), hashlib.sha256).digest()
+    return f"{message}.{_b64(signature)}"
+
+def test_tampered_token():
+    """Test 9: Tampered Signed Token (Should Fail)"""
+    print_test("Tampered Signed Token (Should Fail)")
+    try:
+        token = _login_token()
+        if not token.startswith("st1."):
+            print_info("Server issues Mongo session tokens; skipping signed token checks")
+            return True
+        
+        prefix, payload, signature = token.split(".")
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        claims["typ"] = "Adopter" if claims["typ"] == "NGO" else "NGO"
+        forged_payload = _b64(json.dumps(claims, separators=(",", ":")).encode())
+        flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+        
+        for forged in [f"{prefix}.{forged_payload}.{signature}", f"{prefix}.{payload}.{flipped}"]:
+            response = requests.get(
+                f"{BASE_URL}/api/me",
+                headers={"Authorization": f"Bearer {forged}"}
+            )
+            assert response.status_code == 401
+        print_success("Tampered payload and signature properly rejected")
+        
+        # Non-ASCII signatures must be a 401, not a server error
+        response = requests.get(
+            f"{BASE_URL}/api/me",
+            headers={"Authorization": f"Bearer {prefix}.{payload}.sïgnature".encode()}
+        )
+        assert response.status_code == 401
+        print_success("Non-ASCII signature properly rejected")
+        return True
+    except Exception as e:
+        print_error(f"Tampered token test failed: {e}")
+        return False
+
+def test_expired_token():
+    """Test 10: Expired Signed Token (Should Fail)"""
+    print_test("Expired Signed Token (Should Fail)")
+    try:
+        token = _login_token()
+        secret = os.getenv("SESSION_SIGNING_SECRET")
+        if not token.startswith("st1.") or not secret:
+            print_info("Needs signed tokens and SESSION_SIGNING_SECRET; skipping")
+            return True
+        
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        
+        # A correctly signed copy is accepted, so the expired one fails on expiry alone
+        valid = _sign_token({**claims, "exp": int(time.time()) + 60}, secret)
+        response = requests.get(f"{BASE_URL}/api/me", headers={"Authorization": f"Bearer {valid}"})
+        assert response.status_code == 200
+        
+        expired = _sign_token({**claims, "exp": int(time.time()) - 60}, secret)
+        response = requests.get(f"{BASE_URL}/api/me", headers={"Authorization": f"Bearer {expired}"})
+        assert response.status_code == 401
+        print_success("Expired token properly rejected")
+        return True
+    except Exception as e:
+        print_error(f"Expired token test failed: {e}")
+        return False
+
+def test_revoked_token_after_sync():
+    """Test 11: Logged-Out Token Rejected by Every Worker"""
+    print_test("Logged-Out Token Rejected After Revocation Sync")
+    try:
+        token = _login_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        # Warm the principal caches of whichever workers answer
+        for _ in range(5):
+            assert requests.get(f"{BASE_URL}/api/me", headers=headers).status_code == 200
+        
+        response = requests.post(f"{BASE_URL}/api/logout", headers=headers)
+        assert response.status_code == 200
+        
+        sync_seconds = float(os.getenv("SESSION_REVOCATION_SYNC_SECONDS", "10"))
+        print_info(f"Waiting {sync_seconds + 1:.0f}s for other workers to sync revocations")
+        time.sleep(sync_seconds + 1)
+        
+        for _ in range(10):
+            assert requests.get(f"{BASE_URL}/api/me", headers=headers).status_code == 401
+        print_success("Logged-out token rejected on every request")
+        return True
+    except Exception as e:
+        print_error(f"Revoked token test failed: {e}")
+        return False
+
 def test_create_pet():
-    """Test 9: Create Pet (NGO Only)"""
+    """Test 12: Create Pet (NGO Only)"""
     print_test("Create Pet Listing")
     global test_pet_id
     try:
@@ -233,8 +355,61 @@ def test_create_pet():
             print_error(f"Response: {response.text}")
         return False
 
+def test_async_image_upload():
+    """Test 13: Async Image Upload (IMAGE_UPLOAD_MODE=async)"""
+    print_test("Async Image Upload")
+    try:
+        pet_data = {
+            "name": "Queued Buddy",
+            "type": "Dog",
+            "age": 2,
+            "location": "Test City, TC",
+            "vaccinated": "true",
+            "neutered": "false"
+        }
+        headers = {"Authorization": f"Bearer {ngo_token}"}
+        
+        # Unreadable images are rejected up front, not after staging
+        response = requests.post(
+            f"{BASE_URL}/api/pets",
+            data=pet_data,
+            files={"image": ("broken.png", b"not an image", "image/png")},
+            headers=headers
+        )
+        assert response.status_code == 400
+        print_success("Corrupt image properly rejected")
+        
+        buffer = io.BytesIO()
+        Image.new("RGB", (64, 64), (200, 120, 40)).save(buffer, "PNG")
+        response = requests.post(
+            f"{BASE_URL}/api/pets",
+            data=pet_data,
+            files={"image": ("buddy.png", buffer.getvalue(), "image/png")},
+            headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        if data['image_status'] != "pending":
+            print_info("Server uploads synchronously; skipping queue checks")
+            return True
+        print_success("Pet created with a pending image")
+        
+        # The worker queue uploads the staged file in the background
+        for _ in range(50):
+            pet = requests.get(f"{BASE_URL}/api/pets/{data['id']}").json()
+            if pet['image_status'] != "pending":
+                break
+            time.sleep(0.2)
+        assert pet['image_status'] == "ready"
+        assert pet['image_url']
+        print_success(f"Image uploaded: {pet['image_url']}")
+        return True
+    except Exception as e:
+        print_error(f"Async image upload failed: {e}")
+        return False
+
 def test_adopter_create_pet():
-    """Test 10: Adopter Tries to Create Pet (Should Fail)"""
+    """Test 14: Adopter Tries to Create Pet (Should Fail)"""
     print_test("Adopter Creates Pet (Should Fail)")
     try:
         pet_data = {
@@ -261,7 +436,7 @@ def test_adopter_create_pet():
         return False
 
 def test_get_pets():
-    """Test 11: Get All Pets (Public)"""
+    """Test 15: Get All Pets (Public)"""
     print_test("Get All Pets")
     try:
         response = requests.get(f"{BASE_URL}/api/pets")
@@ -278,7 +453,7 @@ def test_get_pets():
         return False
 
 def test_get_pet_details():
-    """Test 12: Get Specific Pet Details"""
+    """Test 16: Get Specific Pet Details"""
     print_test("Get Pet Details")
     try:
         response = requests.get(f"{BASE_URL}/api/pets/{test_pet_id}")
@@ -293,7 +468,7 @@ def test_get_pet_details():
         return False
 
 def test_filter_pets():
-    """Test 13: Filter Pets by Type"""
+    """Test 17: Filter Pets by Type"""
     print_test("Filter Pets by Type")
     try:
         response = requests.get(f"{BASE_URL}/api/pets?type=Dog")
@@ -305,8 +480,39 @@ def test_filter_pets():
         print_error(f"Filter pets failed: {e}")
         return False
 
+def test_paginate_pets():
+    """Test 18: Paginate Pets with Cursor"""
+    print_test("Paginate Pets with Cursor")
+    try:
+        response = requests.get(f"{BASE_URL}/api/pets?limit=1")
+        assert response.status_code == 200
+        first_page = response.json()
+        assert len(first_page['pets']) <= 1
+        print_success(f"First page: {len(first_page['pets'])} pet(s)")
+        
+        if first_page['next_cursor']:
+            response = requests.get(
+                f"{BASE_URL}/api/pets",
+                params={"limit": 1, "cursor": first_page['next_cursor']}
+            )
+            assert response.status_code == 200
+            second_page = response.json()
+            if second_page['pets']:
+                assert second_page['pets'][0]['_id'] != first_page['pets'][0]['_id']
+            print_success(f"Second page: {len(second_page['pets'])} pet(s)")
+        else:
+            print_info("Only one page of pets available")
+        
+        response = requests.get(f"{BASE_URL}/api/pets?cursor=not-a-cursor")
+        assert response.status_code == 400
+        print_success("Malformed cursor properly rejected")
+        return True
+    except Exception as e:
+        print_error(f"Cursor pagination failed: {e}")
+        return False
+
 def test_ngo_dashboard():
-    """Test 14: NGO Dashboard"""
+    """Test 19: NGO Dashboard"""
     print_test("NGO Dashboard")
     try:
         response = requests.get(
@@ -324,7 +530,7 @@ def test_ngo_dashboard():
         return False
 
 def test_adopter_dashboard():
-    """Test 15: Adopter Dashboard Access (Should Fail)"""
+    """Test 20: Adopter Dashboard Access (Should Fail)"""
     print_test("Adopter Dashboard Access (Should Fail)")
     try:
         response = requests.get(
@@ -339,7 +545,7 @@ def test_adopter_dashboard():
         return False
 
 def test_logout():
-    """Test 16: Logout"""
+    """Test 21: Logout"""
     print_test("Logout")
     try:
         response = requests.post(
@@ -361,6 +567,31 @@ def test_logout():
         print_error(f"Logout failed: {e}")
         return False
 
+def test_rate_limit():
+    """Test 22: Rate Limited Login (Should Fail with 429)"""
+    print_test("Rate Limited Login (Should Fail with 429)")
+    try:
+        # POST /api/login allows a burst of 20 per client IP by default
+        for attempt in range(1, 61):
+            response = requests.post(
+                f"{BASE_URL}/api/login",
+                json={
+                    "email": test_ngo_user["email"],
+                    "password": "wrongpassword"
+                }
+            )
+            if response.status_code != 401:
+                break
+        assert response.status_code == 429, "no 429 after 60 logins (is ADMISSION_CONTROL_ENABLED off?)"
+        retry_after = int(response.headers["Retry-After"])
+        assert retry_after >= 1
+        print_success(f"Request {attempt} rate limited")
+        print_info(f"Retry-After: {retry_after}s")
+        return True
+    except Exception as e:
+        print_error(f"Rate limit test failed: {e}")
+        return False
+
 def run_all_tests():
     """Run all tests in sequence"""
     print(f"\n{Colors.BLUE}{'='*60}")
@@ -376,14 +607,20 @@ def run_all_tests():
         test_invalid_login,
         test_get_current_user,
         test_unauthorized_access,
+        test_tampered_token,
+        test_expired_token,
+        test_revoked_token_after_sync,
         test_create_pet,
+        test_async_image_upload,
         test_adopter_create_pet,
         test_get_pets,
         test_get_pet_details,
         test_filter_pets,
+        test_paginate_pets,
         test_ngo_dashboard,
         test_adopter_dashboard,
         test_logout,
+        test_rate_limit,
     ]
     
     results = []
@@ -1,3 +1,4 @@
 from .security import hash_password, create_session
+from .auth_cache import PrincipalCache, principal_cache
 
-__all__ = ["hash_password", "create_session"]
\ No newline at end of file
+__all__ = ["hash_password", "create_session", "PrincipalCache", "principal_cache"]
@@ -0,0 +1,272 @@
+"""
+Admission control: per-route rate limits and load shedding
+
+Requests are checked before any route code runs. Token buckets per
+client IP and per bearer token answer 429 once a client exceeds its
+route's rate; while the event loop is lagging or MongoDB connection
+checkouts are queueing, every request is answered 503 straight away
+instead of joining the backlog. Both carry a Retry-After header.
+
+State is per worker process, so with N workers a client may reach N
+times the configured rate. The client IP is the ASGI peer address, which
+uvicorn replaces with X-Forwarded-For only for TRUSTED_PROXIES.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from pymongo import monitoring
+
+from .config import settings
+from .metrics import EVENT_LOOP_LAG, HTTP_REQUESTS_SHED, route_template
+
+# Bucket kinds a rule may configure
+LIMIT_KINDS = ("ip", "token")
+DEFAULT_RULE = "*"
+
+
+def load_rate_limits(rules_json: str = "", default: Optional[dict] = None) -> dict:
+    """
+    Parse and validate rate-limit rules
+
+    Args:
+        rules_json: JSON object replacing `default` when non-empty
+        default: Rules to use otherwise (settings.RATE_LIMITS)
+
+    Returns:
+        {"METHOD /route": {kind: (rate per second, burst)}}
+
+    Raises:
+        ValueError: If a rule is malformed
+    """
+    raw = json.loads(rules_json) if rules_json else (default or {})
+    if not isinstance(raw, dict):
+        raise ValueError("Rate limits must be an object keyed by 'METHOD /route'")
+
+    rules = {}
+    for route, limits in raw.items():
+        if not isinstance(limits, dict) or not set(limits) <= set(LIMIT_KINDS):
+            raise ValueError(f"Rate limit for '{route}' must map {LIMIT_KINDS} to [rate, burst]")
+        rules[route] = {}
+        for kind, limit in limits.items():
+            try:
+                rate, burst = (float(value) for value in limit)
+            except (TypeError, ValueError):
+                raise ValueError(f"Rate limit '{route}' {kind} must be [rate, burst]")
+            if rate <= 0 or burst < 1:
+                raise ValueError(f"Rate limit '{route}' {kind} needs rate > 0 and burst >= 1")
+            rules[route][kind] = (rate, burst)
+    return rules
+
+
+class TokenBucketLimiter:
+    """
+    Bounded LRU of token buckets
+
+    A bucket holds up to `burst` tokens, refilled at `rate` per second;
+    each request takes one. Evicting an idle bucket only resets it to full.
+    """
+
+    def __init__(self, max_buckets: int):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[tuple, list[float]]" = OrderedDict()
+
+    def take(self, key: tuple, rate: float, burst: float) -> float:
+        """
+        Take one token from the bucket for `key`
+
+        Returns:
+            0 if the request is admitted, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now]
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class PoolWaitTracker(monitoring.ConnectionPoolListener):
+    """
+    Smoothed time spent waiting for a MongoDB connection checkout
+
+    The average decays while no checkouts happen, so shedding stops on its
+    own once the pool is no longer contended.
+    """
+
+    def __init__(self, half_life_seconds: float = 5.0, weight: float = 0.3):
+        self.half_life_seconds = half_life_seconds
+        self.weight = weight
+        self._average = 0.0
+        self._updated = time.monotonic()
+
+    def _decayed(self, now: float) -> float:
+        return self._average * 0.5 ** ((now - self._updated) / self.half_life_seconds)
+
+    @property
+    def wait_seconds(self) -> float:
+        return self._decayed(time.monotonic())
+
+    def observe(self, seconds: float):
+        now = time.monotonic()
+        self._average = self._decayed(now) * (1 - self.weight) + seconds * self.weight
+        self._updated = now
+
+    def connection_checked_out(self, event):
+        if event.duration is not None:
+            self.observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        if event.duration is not None:
+            self.observe(event.duration)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop wakes a sleeping task"""
+
+    def __init__(self, interval_seconds: float = 0.1, weight: float = 0.5):
+        self.interval_seconds = interval_seconds
+        self.weight = weight
+        self.lag_seconds = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.lag_seconds = 0.0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval_seconds)
+            lag = max(0.0, loop.time() - started - self.interval_seconds)
+            self.lag_seconds = self.lag_seconds * (1 - self.weight) + lag * self.weight
+            EVENT_LOOP_LAG.set(self.lag_seconds)
+
+
+def overload_reason() -> Optional[str]:
+    """Why this worker should shed load right now, or None"""
+    if 0 < settings.ADMISSION_MAX_LOOP_LAG_MS <= loop_lag_monitor.lag_seconds * 1000:
+        return "loop_lag"
+    if 0 < settings.ADMISSION_MAX_POOL_WAIT_MS <= pool_wait_tracker.wait_seconds * 1000:
+        return "pool_wait"
+    return None
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token.strip()
+    return None
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()})
+
+
+class AdmissionMiddleware:
+    """ASGI middleware enforcing RATE_LIMITS and shedding load under overload"""
+
+    def __init__(self, app, rules: Optional[dict] = None):
+        self.app = app
+        self.rules = rules if rules is not None else load_rate_limits(
+            settings.RATE_LIMITS_JSON, settings.RATE_LIMITS
+        )
+        # Separate LRUs, so a flood of new tokens cannot evict IP buckets (or vice versa)
+        self.limiters = {kind: TokenBucketLimiter(settings.RATE_LIMIT_MAX_BUCKETS) for kind in LIMIT_KINDS}
+        self.exempt_paths = set(settings.ADMISSION_EXEMPT_PATHS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+
+        reason = overload_reason()
+        if reason:
+            HTTP_REQUESTS_SHED.labels(route, reason).inc()
+            await _reject(send, 503, "Server is overloaded, please retry", settings.ADMISSION_RETRY_AFTER_SECONDS)
+            return
+
+        rule_name = f"{scope['method']} {route}"
+        if rule_name not in self.rules:
+            rule_name = DEFAULT_RULE
+        limits = self.rules.get(rule_name, {})
+
+        client = scope.get("client")
+        keys = {"ip": client[0] if client else "-", "token": _bearer_token(scope)}
+        for kind in LIMIT_KINDS:
+            if kind not in limits or keys[kind] is None:
+                continue
+            wait = self.limiters[kind].take((rule_name, keys[kind]), *limits[kind])
+            if wait:
+                HTTP_REQUESTS_SHED.labels(route, f"rate_limit_{kind}").inc()
+                await _reject(send, 429, "Too many requests", wait)
+                return
+
+        await self.app(scope, receive, send)
+
+
+# Overload signals for this worker
+pool_wait_tracker = PoolWaitTracker()
+loop_lag_monitor = LoopLagMonitor()
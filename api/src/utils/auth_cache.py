@@ -0,0 +1,90 @@
+"""In-process cache of authenticated principals keyed by session token"""
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from .config import settings
+from .metrics import CacheMetrics
+
+
+class PrincipalCache:
+    """
+    Bounded LRU cache mapping session token -> user principal.
+
+    Entries expire after `ttl_seconds` or when the session's own `expires_at`
+    passes, whichever comes first. Logout evicts the entry in its own
+    worker; other workers drop it once their revocation list syncs
+    (SESSION_REVOCATION_SYNC_SECONDS).
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: str = "auth_principal"):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[dict, float, datetime]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # The same counters, published on /metrics
+        self.metrics = CacheMetrics(name)
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return a copy of the cached principal, or None on a miss"""
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            self.metrics.miss.inc()
+            return None
+
+        principal, deadline, session_expires_at = entry
+        if time.monotonic() >= deadline or datetime.utcnow() >= session_expires_at:
+            del self._entries[token]
+            self.misses += 1
+            self.metrics.miss.inc()
+            self.metrics.entries.set(len(self._entries))
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        self.metrics.hit.inc()
+        return dict(principal)
+
+    def set(self, token: str, principal: dict, session_expires_at: datetime):
+        """Cache a principal until the TTL or the session expiry is reached"""
+        if self.max_entries <= 0:
+            return
+
+        deadline = time.monotonic() + self.ttl_seconds
+        self._entries[token] = (dict(principal), deadline, session_expires_at)
+        self._entries.move_to_end(token)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            self.metrics.eviction.inc()
+        self.metrics.entries.set(len(self._entries))
+
+    def evict(self, token: str):
+        """Drop a token immediately (e.g. on logout)"""
+        self._entries.pop(token, None)
+        self.metrics.entries.set(len(self._entries))
+
+    def clear(self):
+        self._entries.clear()
+        self.metrics.entries.set(0)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+)
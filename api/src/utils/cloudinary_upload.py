@@ -1,78 +1,173 @@
 """Cloudinary image upload utility"""
-import cloudinary
-import cloudinary.uploader
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from fastapi import UploadFile, HTTPException
 from typing import Optional
 import io
 
 from .config import settings
+from .metrics import time_cloudinary_call
 
-# Configure Cloudinary
-cloudinary.config(
-    cloud_name=settings.CLOUDINARY_CLOUD_NAME,
-    api_key=settings.CLOUDINARY_API_KEY,
-    api_secret=settings.CLOUDINARY_API_SECRET
+_uploader = None
+
+def _cloudinary_uploader():
+    """Import and configure the Cloudinary SDK on first use"""
+    global _uploader
+    if _uploader is None:
+        import cloudinary
+        import cloudinary.uploader
+        
+        cloudinary.config(
+            cloud_name=settings.CLOUDINARY_CLOUD_NAME,
+            api_key=settings.CLOUDINARY_API_KEY,
+            api_secret=settings.CLOUDINARY_API_SECRET
+        )
+        _uploader = cloudinary.uploader
+    return _uploader
+
+# The Cloudinary SDK is synchronous; run it on a bounded pool so uploads
+# never block the event loop, and cap how many calls are in flight.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.CLOUDINARY_MAX_WORKERS,
+    thread_name_prefix="cloudinary"
 )
+_concurrency = asyncio.Semaphore(settings.CLOUDINARY_MAX_CONCURRENCY)
 
-async def upload_image_to_cloudinary(
-    file: UploadFile,
-    folder: str = "pets_paws"
-) -> str:
+def _release_slot(future: asyncio.Future):
+    """Free a concurrency slot once its SDK call has actually finished"""
+    _concurrency.release()
+    # A timed-out call's outcome is never awaited; retrieve it so it isn't logged
+    if not future.cancelled():
+        future.exception()
+
+async def _run_cloudinary_call(func, *args, deadline: float, **kwargs):
     """
-    Upload an image file to Cloudinary
+    Run a blocking Cloudinary SDK call off the event loop with a deadline
     
-    Args:
-        file: The image file to upload
-        folder: The folder name in Cloudinary (default: "pets_paws")
+    The deadline covers the SDK call, not the wait for a concurrency slot.
+    A call that times out keeps its slot until its thread returns, so no
+    more than CLOUDINARY_MAX_CONCURRENCY SDK calls ever run at once.
     
-    Returns:
-        The secure URL of the uploaded image
+    Raises:
+        asyncio.TimeoutError: If the call does not finish within `deadline`
+    """
+    async with time_cloudinary_call(func.__name__) as acquired:
+        await _concurrency.acquire()
+        acquired()
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+        except BaseException:
+            _concurrency.release()
+            raise
+        future.add_done_callback(_release_slot)
+        # Shielded: timing out stops the wait, not the thread
+        return await asyncio.wait_for(asyncio.shield(future), timeout=deadline)
+
+# Largest image accepted anywhere (uploads and import archives)
+MAX_IMAGE_BYTES = 10 * 1024 * 1024  # 10MB in bytes
+
+def validate_image(content_type: Optional[str], file_content: bytes):
+    """
+    Check an image's declared type and size
     
     Raises:
-        HTTPException: If upload fails or file type is invalid
+        HTTPException: If the file type is invalid or the file is too large
     """
     # Validate file type
     allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/webp"]
-    if file.content_type not in allowed_types:
+    if content_type not in allowed_types:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid file type. Allowed types: {', '.join(allowed_types)}"
         )
     
     # Validate file size (max 10MB)
-    max_size = 10 * 1024 * 1024  # 10MB in bytes
-    file_content = await file.read()
-    if len(file_content) > max_size:
+    if len(file_content) > MAX_IMAGE_BYTES:
         raise HTTPException(
             status_code=400,
             detail="File size exceeds 10MB limit"
         )
+
+
+async def read_image_upload(file: UploadFile) -> bytes:
+    """
+    Validate an uploaded image and return its bytes
     
+    Raises:
+        HTTPException: If the file type is invalid or the file is too large
+    """
+    file_content = await file.read()
+    await file.seek(0)
+    validate_image(file.content_type, file_content)
+    return file_content
+
+
+async def upload_bytes_to_cloudinary(
+    file_content: bytes,
+    folder: str = "pets_paws"
+) -> str:
+    """
+    Upload already-validated image bytes to Cloudinary
+    
+    Returns:
+        The secure URL of the uploaded image
+    
+    Raises:
+        HTTPException: If the upload fails or times out
+    """
     try:
         # Upload to Cloudinary
-        result = cloudinary.uploader.upload(
+        result = await _run_cloudinary_call(
+            _cloudinary_uploader().upload,
             file_content,
             folder=folder,
             resource_type="image",
             transformation=[
                 {'width': 1000, 'height': 1000, 'crop': 'limit'},  # Limit max dimensions
                 {'quality': 'auto:good'}  # Auto quality optimization
-            ]
+            ],
+            timeout=settings.CLOUDINARY_UPLOAD_TIMEOUT_SECONDS,  # HTTP timeout in the SDK
+            deadline=settings.CLOUDINARY_UPLOAD_TIMEOUT_SECONDS
         )
         
         return result["secure_url"]
     
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail="Timed out uploading image to Cloudinary"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to upload image to Cloudinary: {str(e)}"
         )
-    finally:
-        # Reset file pointer
-        await file.seek(0)
 
 
-def delete_image_from_cloudinary(image_url: str) -> bool:
+async def upload_image_to_cloudinary(
+    file: UploadFile,
+    folder: str = "pets_paws"
+) -> str:
+    """
+    Upload an image file to Cloudinary
+    
+    Args:
+        file: The image file to upload
+        folder: The folder name in Cloudinary (default: "pets_paws")
+    
+    Returns:
+        The secure URL of the uploaded image
+    
+    Raises:
+        HTTPException: If upload fails or file type is invalid
+    """
+    file_content = await read_image_upload(file)
+    return await upload_bytes_to_cloudinary(file_content, folder=folder)
+
+
+async def delete_image_from_cloudinary(image_url: str) -> bool:
     """
     Delete an image from Cloudinary using its URL
     
@@ -95,7 +190,12 @@ def delete_image_from_cloudinary(image_url: str) -> bool:
         public_id = public_id_with_ext.rsplit(".", 1)[0]  # Remove file extension
         
         # Delete from Cloudinary
-        result = cloudinary.uploader.destroy(public_id)
+        result = await _run_cloudinary_call(
+            _cloudinary_uploader().destroy,
+            public_id,
+            timeout=settings.CLOUDINARY_DELETE_TIMEOUT_SECONDS,
+            deadline=settings.CLOUDINARY_DELETE_TIMEOUT_SECONDS
+        )
         
         return result.get("result") == "ok"
     
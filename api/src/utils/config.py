@@ -1,23 +1,49 @@
 import os
+import tempfile
 from typing import Optional
+from dotenv import load_dotenv
+
+# Load environment variables from .env file (the only place this happens)
+load_dotenv()
 
 class Settings:
-    """Application settings"""
+    """
+    Application settings
+    
+    Reading settings never fails; values that are required to talk to a
+    service (e.g. MONGODB_URI) are checked when that client is first built.
+    """
     
     # MongoDB
     MONGODB_URI: str = os.getenv("MONGODB_URI", "")
     
-    if not MONGODB_URI:
-        raise ValueError(
-            "MONGODB_URI environment variable is not set. "
-            "Please set it in your .env file."
-        )
+    DATABASE_NAME: str = os.getenv("DATABASE_NAME", "pets_paws_db")
     
-    DATABASE_NAME: str = "pets_paws_db"
+    # MongoDB connection pool and timeouts
+    MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", "100"))
+    MONGODB_MIN_POOL_SIZE: int = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+    MONGODB_CONNECT_TIMEOUT_MS: int = int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", "10000"))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+    MONGODB_SOCKET_TIMEOUT_MS: int = int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", "20000"))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+    # Read preference for public catalog reads (pet list and detail); auth,
+    # dashboards and writes always use the primary. Staleness must be >= 90 or -1.
+    CATALOG_READ_PREFERENCE: str = os.getenv("CATALOG_READ_PREFERENCE", "secondaryPreferred")
+    CATALOG_MAX_STALENESS_SECONDS: int = int(os.getenv("CATALOG_MAX_STALENESS_SECONDS", "90"))
+    # Connections opened concurrently in the background at startup (0 disables warm-up)
+    MONGODB_WARMUP_CONNECTIONS: int = int(os.getenv("MONGODB_WARMUP_CONNECTIONS", "1"))
+    # Index sync at startup: "background", "blocking" or "off"
+    STARTUP_INDEX_MODE: str = os.getenv("STARTUP_INDEX_MODE", "background")
     
     # API
-    API_HOST: str = "0.0.0.0"
-    API_PORT: int = 8000
+    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    # Worker processes for `python -m src.serve` (0 = one per CPU core)
+    API_WORKERS: int = int(os.getenv("API_WORKERS", "0"))
+    # Seconds a worker waits for in-flight requests when asked to stop
+    SHUTDOWN_GRACE_SECONDS: float = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "30"))
+    # Seconds a worker reports "draining" on /health/ready after SIGTERM before it stops accepting
+    SHUTDOWN_DRAIN_SECONDS: float = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "5"))
     
     # CORS
     ALLOWED_ORIGINS: list = [
@@ -25,12 +51,116 @@ class Settings:
         "https://your-domain.com"
     ]
     
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
+    # Slow-query recorder (a negative threshold disables it)
+    SLOW_QUERY_THRESHOLD_MS: float = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+    SLOW_QUERY_BUFFER_SIZE: int = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "500"))
+    SLOW_QUERY_MAX_SHAPES: int = int(os.getenv("SLOW_QUERY_MAX_SHAPES", "1000"))
+    SLOW_QUERY_EXPLAIN: bool = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    
+    # Admission control: per-route token buckets and load shedding (per worker process)
+    ADMISSION_CONTROL_ENABLED: bool = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+    # "METHOD /route/template" -> {"ip" and/or "token": [requests per second, burst]};
+    # "*" applies to routes without their own entry. Every configured bucket
+    # applies, so an "ip" bucket also catches requests that send no token
+    RATE_LIMITS: dict = {
+        "*": {"ip": [50, 100], "token": [50, 100]},
+        "GET /api/pets": {"ip": [10, 40], "token": [20, 60]},
+        "GET /api/pets/search": {"ip": [5, 20], "token": [10, 40]},
+        "GET /api/pets/export": {"ip": [0.05, 2], "token": [0.1, 3]},
+        "POST /api/login": {"ip": [1, 20]},
+        "POST /api/signup": {"ip": [0.5, 10]},
+        "POST /api/pets/import": {"ip": [0.2, 4], "token": [0.1, 2]},
+    }
+    # Optional JSON object in the same shape, replacing RATE_LIMITS entirely
+    RATE_LIMITS_JSON: str = os.getenv("RATE_LIMITS_JSON", "")
+    # Buckets kept per kind ("ip" and "token" have separate LRUs)
+    RATE_LIMIT_MAX_BUCKETS: int = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "100000"))
+    # Reverse proxies (comma-separated IPs/CIDRs, "*" for any) whose X-Forwarded-For
+    # names the client; per-IP limits would otherwise key on the proxy's address
+    TRUSTED_PROXIES: str = os.getenv("TRUSTED_PROXIES", "127.0.0.1")
+    # Shed load with 503 past these (0 disables the check)
+    ADMISSION_MAX_LOOP_LAG_MS: float = float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "250"))
+    ADMISSION_MAX_POOL_WAIT_MS: float = float(os.getenv("ADMISSION_MAX_POOL_WAIT_MS", "1000"))
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+    # Never limited or shed (probes and scrapes)
+    ADMISSION_EXEMPT_PATHS: list = ["/", "/health/ready", "/metrics"]
+    
+    # Admin endpoints are disabled unless a key is set (sent as X-Admin-Key)
+    ADMIN_API_KEY: str = os.getenv("ADMIN_API_KEY", "")
+    
     # Security
     SESSION_EXPIRE_DAYS: int = 7
+    # "mongo" issues random tokens stored in the sessions collection;
+    # "signed" issues stateless HMAC-signed tokens (requires SESSION_SIGNING_SECRET)
+    SESSION_TOKEN_FORMAT: str = os.getenv("SESSION_TOKEN_FORMAT", "mongo")
+    SESSION_SIGNING_SECRET: str = os.getenv("SESSION_SIGNING_SECRET", "")
+    SESSION_REVOCATION_SYNC_SECONDS: float = float(os.getenv("SESSION_REVOCATION_SYNC_SECONDS", "10"))
+    
+    # Authenticated-principal cache (token -> user)
+    AUTH_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+    
+    # Cached listing counts (invalidated on writes in this process)
+    COUNT_CACHE_MAX_ENTRIES: int = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "1000"))
+    COUNT_CACHE_TTL_SECONDS: float = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+    
+    # Recent pets kept on each NGO's dashboard stats document
+    NGO_STATS_RECENT_PETS: int = int(os.getenv("NGO_STATS_RECENT_PETS", "10"))
+    
+    # Faceted search: cached facet counts per filter (invalidated on writes in this process)
+    FACET_CACHE_MAX_ENTRIES: int = int(os.getenv("FACET_CACHE_MAX_ENTRIES", "500"))
+    FACET_CACHE_TTL_SECONDS: float = float(os.getenv("FACET_CACHE_TTL_SECONDS", "15"))
+    FACET_LOCATION_LIMIT: int = int(os.getenv("FACET_LOCATION_LIMIT", "10"))
+    
+    # "Pets near me": search radius when none is given, and the largest allowed
+    NEAR_DEFAULT_RADIUS_KM: float = float(os.getenv("NEAR_DEFAULT_RADIUS_KM", "25"))
+    NEAR_MAX_RADIUS_KM: float = float(os.getenv("NEAR_MAX_RADIUS_KM", "500"))
+    
+    # HTTP caching for public pet endpoints
+    PETS_LIST_CACHE_CONTROL: str = os.getenv("PETS_LIST_CACHE_CONTROL", "public, max-age=30")
+    PET_DETAIL_CACHE_CONTROL: str = os.getenv("PET_DETAIL_CACHE_CONTROL", "public, max-age=60")
     
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: str = os.getenv("CLOUDINARY_CLOUD_NAME", "")
     CLOUDINARY_API_KEY: str = os.getenv("CLOUDINARY_API_KEY", "")
     CLOUDINARY_API_SECRET: str = os.getenv("CLOUDINARY_API_SECRET", "")
+    CLOUDINARY_MAX_WORKERS: int = int(os.getenv("CLOUDINARY_MAX_WORKERS", "8"))
+    CLOUDINARY_MAX_CONCURRENCY: int = int(os.getenv("CLOUDINARY_MAX_CONCURRENCY", "8"))
+    CLOUDINARY_UPLOAD_TIMEOUT_SECONDS: float = float(os.getenv("CLOUDINARY_UPLOAD_TIMEOUT_SECONDS", "60"))
+    CLOUDINARY_DELETE_TIMEOUT_SECONDS: float = float(os.getenv("CLOUDINARY_DELETE_TIMEOUT_SECONDS", "15"))
+    
+    # Image pipeline: "sync" uploads inside create_pet, "async" queues the upload
+    IMAGE_UPLOAD_MODE: str = os.getenv("IMAGE_UPLOAD_MODE", "sync")
+    # Queue backend: "cloudinary", or "local" to store images on disk (offline/testing)
+    IMAGE_UPLOAD_BACKEND: str = os.getenv("IMAGE_UPLOAD_BACKEND", "cloudinary")
+    IMAGE_STAGING_DIR: str = os.getenv(
+        "IMAGE_STAGING_DIR", os.path.join(tempfile.gettempdir(), "pets_paws", "staging")
+    )
+    IMAGE_LOCAL_DIR: str = os.getenv(
+        "IMAGE_LOCAL_DIR", os.path.join(tempfile.gettempdir(), "pets_paws", "media")
+    )
+    IMAGE_LOCAL_BASE_URL: str = os.getenv("IMAGE_LOCAL_BASE_URL", "http://localhost:8000/media")
+    IMAGE_QUEUE_WORKERS: int = int(os.getenv("IMAGE_QUEUE_WORKERS", "2"))
+    IMAGE_QUEUE_MAX_RETRIES: int = int(os.getenv("IMAGE_QUEUE_MAX_RETRIES", "5"))
+    IMAGE_QUEUE_RETRY_BASE_SECONDS: float = float(os.getenv("IMAGE_QUEUE_RETRY_BASE_SECONDS", "2"))
+    # How long a worker process owns a pending image job before others may take it over
+    IMAGE_QUEUE_LEASE_SECONDS: float = float(os.getenv("IMAGE_QUEUE_LEASE_SECONDS", "300"))
+    # Local preprocessing before upload
+    IMAGE_MAX_DIMENSION: int = int(os.getenv("IMAGE_MAX_DIMENSION", "1000"))
+    IMAGE_OUTPUT_FORMAT: str = os.getenv("IMAGE_OUTPUT_FORMAT", "WEBP")  # "WEBP" or "JPEG"
+    IMAGE_QUALITY: int = int(os.getenv("IMAGE_QUALITY", "82"))
+    
+    # Catalog export: pets per cursor batch and per streamed chunk
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    
+    # Bulk pet import
+    BULK_IMPORT_MAX_ROWS: int = int(os.getenv("BULK_IMPORT_MAX_ROWS", "5000"))
+    BULK_IMPORT_BATCH_SIZE: int = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "500"))
+    BULK_IMPORT_UPLOAD_CONCURRENCY: int = int(os.getenv("BULK_IMPORT_UPLOAD_CONCURRENCY", "8"))
+    # Total uncompressed size allowed for an images_archive zip
+    BULK_IMPORT_MAX_ARCHIVE_BYTES: int = int(os.getenv("BULK_IMPORT_MAX_ARCHIVE_BYTES", str(500 * 1024 * 1024)))
 
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""Streaming NDJSON/CSV serialization of the pet catalog"""
+import csv
+import io
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+from ..db.models import PetResponse
+from .responses import dumps
+
+# Oldest first, so an export can be resumed with since=<last created_at> (inclusive)
+EXPORT_SORT = [("created_at", 1), ("_id", 1)]
+
+# Flat CSV columns: the public pet fields, with the NGO summary split out
+CSV_FIELDS = [field for field in PetResponse.model_fields if field != "ngo"] + ["ngo_name", "ngo_email"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def normalize_since(since: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps are naive UTC; convert an aware `since` to match"""
+    if since is not None and since.tzinfo is not None:
+        return since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def _public_pet(pet: dict) -> dict:
+    """Mongo document -> public field names ("_id" becomes "id")"""
+    row = {key: value for key, value in pet.items() if key != "_id"}
+    return {"id": str(pet["_id"]), **row}
+
+
+def _csv_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_row(pet: dict) -> list:
+    row = _public_pet(pet)
+    ngo = row.pop("ngo", None) or {}
+    row["ngo_name"] = ngo.get("name")
+    row["ngo_email"] = ngo.get("email")
+    return [_csv_value(row.get(field)) for field in CSV_FIELDS]
+
+
+async def stream_export(cursor, fmt: str, batch_size: int) -> AsyncIterator[bytes]:
+    """
+    Yield an export chunk per `batch_size` pets read from `cursor`
+
+    Only one chunk is held in memory at a time, however large the catalog.
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_FIELDS)
+        rows = 0
+        async for pet in cursor:
+            writer.writerow(_csv_row(pet))
+            rows += 1
+            if rows % batch_size == 0:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+        return
+
+    lines = []
+    async for pet in cursor:
+        lines.append(dumps(_public_pet(pet)))
+        if len(lines) >= batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
@@ -0,0 +1,111 @@
+"""Offline geocoding of pet locations and "pets near me" queries"""
+import csv
+import os
+import re
+from functools import lru_cache
+from typing import Optional
+
+from .location import normalize_location
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "gazetteer.csv")
+
+# Equatorial radius used by MongoDB to convert $centerSphere radians
+EARTH_RADIUS_KM = 6378.1
+
+# Only this much of a location is geocoded (and `near` may be no longer)
+MAX_LOCATION_LENGTH = 200
+
+_COORDINATES = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+
+@lru_cache(maxsize=1)
+def _gazetteer() -> tuple[dict[str, tuple[float, float]], int]:
+    """
+    Normalized place name (and alias) -> (longitude, latitude), plus the
+    word count of the longest name
+    """
+    places = {}
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            point = (float(row["longitude"]), float(row["latitude"]))
+            for name in [row["name"], *row["aliases"].split("|")]:
+                key = normalize_location(name)
+                if key:
+                    places.setdefault(key, point)
+    longest = max((len(key.split()) for key in places), default=0)
+    return places, longest
+
+
+def resolve_location(location: str) -> Optional[tuple[float, float]]:
+    """
+    Look a free-text location up in the bundled gazetteer
+
+    Tries the whole string, then each comma-separated part ("Andheri,
+    Mumbai"), then the longest run of words naming a known place
+    ("Koregaon Park Pune MH"). Only the first MAX_LOCATION_LENGTH
+    characters are considered.
+
+    Returns:
+        (longitude, latitude), or None if no known place is mentioned
+    """
+    places, longest = _gazetteer()
+    location = location[:MAX_LOCATION_LENGTH]
+
+    candidates = [location, *location.split(",")]
+    for candidate in candidates:
+        key = normalize_location(candidate)
+        if key in places:
+            return places[key]
+
+    # No name is longer than `longest` words, so longer runs cannot match
+    words = normalize_location(location).split()
+    for length in range(min(len(words), longest), 0, -1):
+        for start in range(len(words) - length + 1):
+            key = " ".join(words[start:start + length])
+            if key in places:
+                return places[key]
+    return None
+
+
+def geo_point(location: str) -> Optional[dict]:
+    """GeoJSON point for a location, as stored on pets (None if unknown)"""
+    resolved = resolve_location(location)
+    if resolved is None:
+        return None
+    return {"type": "Point", "coordinates": list(resolved)}
+
+
+def parse_near(near: str) -> Optional[tuple[float, float]]:
+    """
+    (longitude, latitude) for a `near` parameter
+
+    Accepts "lat,lon" coordinates or a place name from the gazetteer.
+    Returns None for unknown places or out-of-range coordinates.
+    """
+    match = _COORDINATES.match(near)
+    if not match:
+        return resolve_location(near)
+
+    latitude, longitude = float(match.group(1)), float(match.group(2))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return longitude, latitude
+
+
+def within_radius(point: tuple[float, float], radius_km: float) -> dict:
+    """Filter for pets within `radius_km` of `point` (usable with count_documents)"""
+    return {"geo": {"$geoWithin": {"$centerSphere": [list(point), radius_km / EARTH_RADIUS_KM]}}}
+
+
+def geo_near_stage(point: tuple[float, float], radius_km: float, query: dict) -> dict:
+    """$geoNear stage: pets matching `query` within `radius_km`, nearest first"""
+    return {"$geoNear": {
+        "near": {"type": "Point", "coordinates": list(point)},
+        "key": "geo",
+        "distanceField": "distance_km",
+        # Distances are computed in meters; report them in km
+        "distanceMultiplier": 0.001,
+        "maxDistance": radius_km * 1000,
+        "spherical": True,
+        "query": query,
+    }}
@@ -0,0 +1,28 @@
+"""ETag and conditional GET helpers for public endpoints"""
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag derived from version identifiers (not from the body)"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+
+    return etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Bodyless 304 carrying the validators a cache needs"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
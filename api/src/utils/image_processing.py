@@ -0,0 +1,108 @@
+"""Local image preprocessing and content-hash deduplication before upload"""
+import asyncio
+import hashlib
+import io
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError
+from pymongo.asynchronous.database import AsyncDatabase
+
+from .config import settings
+
+
+def preprocess_image(content: bytes) -> bytes:
+    """
+    Downscale, re-encode and strip metadata from an image
+
+    Applies the same bounds Cloudinary used to enforce after upload
+    (fit within IMAGE_MAX_DIMENSION, never upscale). EXIF orientation is
+    applied before metadata is dropped.
+
+    Raises:
+        HTTPException: If the bytes are not a readable image
+    """
+    bounds = (settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_DIMENSION)
+    output_format = settings.IMAGE_OUTPUT_FORMAT.upper()
+
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            # Let the JPEG decoder downscale while decoding
+            image.draft("RGB", bounds)
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail(bounds, Image.Resampling.LANCZOS)
+
+            if output_format == "JPEG" and image.mode != "RGB":
+                image = image.convert("RGB")
+            elif image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+
+            buffer = io.BytesIO()
+            # No exif/icc arguments are passed, so metadata is not written
+            image.save(buffer, format=output_format, quality=settings.IMAGE_QUALITY)
+            return buffer.getvalue()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise HTTPException(status_code=400, detail="Invalid or corrupt image file")
+
+
+def verify_image(content: bytes):
+    """
+    Check that bytes are an image the upload worker will be able to decode
+
+    verify() catches structural damage but accepts truncated JPEGs, so the
+    pixels are also decoded (JPEGs at reduced scale, as preprocessing does).
+
+    Raises:
+        HTTPException: If the bytes are not a readable image
+    """
+    bounds = (settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_DIMENSION)
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            image.verify()
+        # verify() leaves the image unusable; decode from a fresh handle
+        with Image.open(io.BytesIO(content)) as image:
+            image.draft("RGB", bounds)
+            image.load()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise HTTPException(status_code=400, detail="Invalid or corrupt image file")
+
+
+async def prepare_image(content: bytes) -> tuple[bytes, str]:
+    """Preprocess off the event loop; return the bytes and their SHA-256"""
+    processed = await asyncio.to_thread(preprocess_image, content)
+    return processed, hashlib.sha256(processed).hexdigest()
+
+
+async def upload_image_deduplicated(
+    db: AsyncDatabase,
+    content: bytes,
+    folder: str,
+    upload: Callable[[bytes, str], Awaitable[str]]
+) -> str:
+    """
+    Preprocess an image and upload it unless identical bytes were uploaded before
+
+    Args:
+        db: Database holding the content-hash -> URL index (`images`)
+        content: Raw uploaded image bytes
+        folder: Destination folder passed to `upload`
+        upload: Coroutine that uploads bytes and returns the public URL
+
+    Returns:
+        The URL of the uploaded (or previously uploaded) image
+    """
+    processed, content_hash = await prepare_image(content)
+
+    existing = await db.images.find_one({"_id": content_hash}, {"url": 1})
+    if existing:
+        return existing["url"]
+
+    url = await upload(processed, folder)
+
+    await db.images.update_one(
+        {"_id": content_hash},
+        {"$setOnInsert": {"url": url, "size": len(processed), "created_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return url
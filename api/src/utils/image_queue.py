@@ -0,0 +1,310 @@
+"""Background image upload pipeline for pet creation"""
+import asyncio
+import mimetypes
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.asynchronous.database import AsyncDatabase
+
+from .config import settings
+from .cloudinary_upload import upload_bytes_to_cloudinary
+from .image_processing import upload_image_deduplicated
+from ..db.catalog_version import bump_catalog_version
+from ..db.ngo_stats import COUNTED_FIELDS, record_pet_updated
+
+
+def _write_file(path: str, content: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def stage_image(content: bytes, content_type: Optional[str]) -> str:
+    """Save an uploaded image to local staging storage and return its path"""
+    extension = mimetypes.guess_extension(content_type or "") or ""
+    path = os.path.join(settings.IMAGE_STAGING_DIR, f"{uuid.uuid4().hex}{extension}")
+    await asyncio.to_thread(_write_file, path, content)
+    return path
+
+
+class CloudinaryImageBackend:
+    """Uploads staged images to Cloudinary"""
+
+    async def upload(self, content: bytes, folder: str) -> str:
+        return await upload_bytes_to_cloudinary(content, folder=folder)
+
+
+class LocalImageBackend:
+    """Offline stand-in for Cloudinary that stores images on local disk"""
+
+    def __init__(self, directory: str, base_url: str):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+
+    async def upload(self, content: bytes, folder: str) -> str:
+        name = uuid.uuid4().hex
+        await asyncio.to_thread(_write_file, os.path.join(self.directory, folder, name), content)
+        return f"{self.base_url}/{folder}/{name}"
+
+
+class ImageUploadQueue:
+    """
+    In-process worker queue that uploads staged pet images
+
+    Pets are inserted with image_status "pending"; a worker uploads the
+    staged file, then patches image_url and marks the pet "ready". Failed
+    uploads are retried with exponential backoff and marked "failed" once
+    retries are exhausted.
+
+    With several worker processes each one runs a queue, so a job is only
+    processed by the queue holding its lease (image_owner and
+    image_lease_until on the pet, taken atomically). Pending pets whose
+    lease is free or expired are claimed on start and then periodically,
+    so jobs survive a restart or a dead worker as long as the staging
+    directory does.
+    """
+
+    def __init__(
+        self,
+        backend,
+        workers: int,
+        max_retries: int,
+        retry_base_seconds: float,
+        lease_seconds: float = 300
+    ):
+        self.backend = backend
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.lease_seconds = lease_seconds
+        self.owner_id: Optional[str] = None
+        self._queue: "asyncio.Queue[dict]" = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._recovery: Optional[asyncio.Task] = None
+        self._retries: set[asyncio.Task] = set()
+        self._db: Optional[AsyncDatabase] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self, db: AsyncDatabase):
+        """
+        Start workers and re-queue pets left pending by a previous run
+
+        Recovery runs in the background, so starting never waits on MongoDB.
+        """
+        if self.running:
+            return
+
+        # Leases are per process; a forked or restarted worker is a new owner
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._db = db
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._recovery = asyncio.create_task(self._recover_periodically())
+
+    def _claimable(self, now: datetime) -> dict:
+        """Pending pets this queue may take: unowned, already ours, or with a lapsed lease"""
+        return {
+            "image_status": "pending",
+            "$or": [
+                {"image_owner": None},
+                {"image_owner": self.owner_id},
+                {"image_lease_until": {"$lt": now}},
+            ]
+        }
+
+    async def _claim(self, query: dict, extra_seconds: float = 0) -> Optional[dict]:
+        """Atomically take (or renew) the lease on one matching pet"""
+        now = datetime.utcnow()
+        return await self._db.pets.find_one_and_update(
+            {**query, **self._claimable(now)},
+            {"$set": {
+                "image_owner": self.owner_id,
+                "image_lease_until": now + timedelta(seconds=self.lease_seconds + extra_seconds)
+            }},
+            projection={"image_staging_path": 1, "image_folder": 1}
+        )
+
+    async def recover(self) -> int:
+        """Claim and queue pending pets left by a previous run or a dead worker"""
+        recovered = 0
+        # Skip pets already queued here; their lease is renewed when processed
+        while pet := await self._claim({"image_owner": {"$ne": self.owner_id}}):
+            staging_path, folder = pet.get("image_staging_path"), pet.get("image_folder")
+            if not staging_path or not folder:
+                await self._mark(str(pet["_id"]), {
+                    "image_status": "failed",
+                    "image_error": "Staged image is missing"
+                })
+                continue
+            await self.enqueue(str(pet["_id"]), staging_path, folder)
+            recovered += 1
+        return recovered
+
+    async def _recover_periodically(self):
+        # Recover right away, then whenever leases may have lapsed
+        while True:
+            try:
+                await self.recover()
+            except Exception as e:
+                print(f"✗ Failed to recover pending image jobs: {e}")
+            await asyncio.sleep(self.lease_seconds)
+
+    async def stop(self):
+        """Cancel workers and scheduled retries and release their leases"""
+        tasks = [*self._tasks, *self._retries, *([self._recovery] if self._recovery else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._retries.clear()
+        self._recovery = None
+
+        # Hand unfinished jobs back so a restarted worker can take them at once
+        if self._db is not None and self.owner_id:
+            try:
+                await self._db.pets.update_many(
+                    {"image_status": "pending", "image_owner": self.owner_id},
+                    {"$unset": {"image_owner": "", "image_lease_until": ""}}
+                )
+            except Exception as e:
+                print(f"✗ Failed to release image job leases: {e}")
+
+    async def enqueue(self, pet_id: str, staging_path: str, folder: str, attempts: int = 0):
+        await self._queue.put({
+            "pet_id": pet_id,
+            "path": staging_path,
+            "folder": folder,
+            "attempts": attempts
+        })
+
+    async def join(self):
+        """Wait until every queued job (excluding scheduled retries) is processed"""
+        await self._queue.join()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retries),
+            "workers": len(self._tasks),
+        }
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                print(f"✗ Image job for pet {job['pet_id']} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job: dict):
+        # Another worker holds the lease (or the job is no longer pending)
+        if not await self._claim({"_id": ObjectId(job["pet_id"])}):
+            return
+
+        finished = False
+        try:
+            content = await asyncio.to_thread(_read_file, job["path"])
+            image_url = await upload_image_deduplicated(
+                self._db, content, job["folder"], self.backend.upload
+            )
+        except Exception as e:
+            job["attempts"] += 1
+            error = getattr(e, "detail", None) or str(e)
+            # Client errors (e.g. an unreadable image) and a lost staged file
+            # will not succeed on retry
+            retryable = not (
+                isinstance(e, FileNotFoundError)
+                or (isinstance(e, HTTPException) and e.status_code < 500)
+            )
+            if not retryable or job["attempts"] > self.max_retries:
+                finished = True
+                await self._mark(
+                    job["pet_id"],
+                    {"image_status": "failed", "image_error": error},
+                    unset=["image_staging_path", "image_folder"]
+                )
+                return
+
+            delay = self.retry_base_seconds * 2 ** (job["attempts"] - 1)
+            # Hold the lease through the backoff so no other worker takes the job
+            await self._claim({"_id": ObjectId(job["pet_id"])}, extra_seconds=delay)
+            task = asyncio.create_task(self._retry_later(job, delay))
+            self._retries.add(task)
+            task.add_done_callback(self._retries.discard)
+            return
+        else:
+            finished = True
+            await self._mark(
+                job["pet_id"],
+                {"image_url": image_url, "image_status": "ready"},
+                unset=["image_staging_path", "image_folder", "image_error"]
+            )
+        finally:
+            if finished:
+                await self._discard_staged(job["path"])
+
+    async def _discard_staged(self, path: str):
+        """Remove a staged file once no pending pet refers to it"""
+        # Bulk imports may share one staged file between several pets
+        still_needed = await self._db.pets.find_one(
+            {"image_status": "pending", "image_staging_path": path}, {"_id": 1}
+        )
+        if not still_needed:
+            await asyncio.to_thread(_remove_file, path)
+
+    async def _retry_later(self, job: dict, delay: float):
+        await asyncio.sleep(delay)
+        await self._queue.put(job)
+
+    async def _mark(self, pet_id: str, fields: dict, unset: Optional[list] = None):
+        """Finish a job we hold the lease for (a no-op if the lease was lost)"""
+        update = {
+            "$set": fields,
+            "$inc": {"version": 1},
+            "$unset": {field: "" for field in [*(unset or []), "image_owner", "image_lease_until"]}
+        }
+
+        before = await self._db.pets.find_one_and_update(
+            {"_id": ObjectId(pet_id), "image_owner": self.owner_id},
+            update,
+            projection={"ngo_user_id": 1, **{field: 1 for field in COUNTED_FIELDS}}
+        )
+        if before:
+            await bump_catalog_version(self._db)
+            await record_pet_updated(self._db, before["ngo_user_id"], before["_id"], before, fields)
+
+
+def _build_backend():
+    if settings.IMAGE_UPLOAD_BACKEND == "local":
+        return LocalImageBackend(settings.IMAGE_LOCAL_DIR, settings.IMAGE_LOCAL_BASE_URL)
+    return CloudinaryImageBackend()
+
+
+image_queue = ImageUploadQueue(
+    backend=_build_backend(),
+    workers=settings.IMAGE_QUEUE_WORKERS,
+    max_retries=settings.IMAGE_QUEUE_MAX_RETRIES,
+    retry_base_seconds=settings.IMAGE_QUEUE_RETRY_BASE_SECONDS,
+    lease_seconds=settings.IMAGE_QUEUE_LEASE_SECONDS,
+)
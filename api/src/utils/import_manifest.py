@@ -0,0 +1,109 @@
+"""Parsing of bulk pet import manifests and image bundles"""
+import asyncio
+import csv
+import io
+import json
+import mimetypes
+import os
+import zipfile
+import zlib
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from .cloudinary_upload import MAX_IMAGE_BYTES
+from .config import settings
+
+# Name -> coroutine returning (content_type, bytes)
+ImageLoader = Callable[[], Awaitable[tuple[Optional[str], bytes]]]
+
+
+def parse_manifest(content: bytes, filename: Optional[str], content_type: Optional[str]) -> list[dict]:
+    """
+    Parse a CSV or JSON manifest into a list of row dicts
+
+    JSON may be a list of objects or {"pets": [...]}. Empty CSV cells are
+    dropped so optional fields fall back to their defaults.
+
+    Raises:
+        HTTPException: If the manifest cannot be parsed
+    """
+    is_json = (content_type or "").endswith("json") or (filename or "").lower().endswith(".json")
+
+    try:
+        text = content.decode("utf-8-sig")
+        if is_json:
+            data = json.loads(text)
+            rows = data.get("pets") if isinstance(data, dict) else data
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                raise ValueError("expected a list of pet objects")
+        else:
+            rows = list(csv.DictReader(io.StringIO(text)))
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid manifest: {e}")
+
+    cleaned = []
+    for row in rows:
+        cleaned.append({
+            key.strip(): value.strip() if isinstance(value, str) else value
+            for key, value in row.items()
+            if key and value not in ("", None)
+        })
+    return cleaned
+
+
+def _read_member(bundle: zipfile.ZipFile, member: zipfile.ZipInfo) -> bytes:
+    """
+    Decompress one archive member, never more than MAX_IMAGE_BYTES + 1
+
+    Raises:
+        HTTPException: If the member is corrupt or inflates past the image size limit
+    """
+    try:
+        with bundle.open(member) as f:
+            content = f.read(MAX_IMAGE_BYTES + 1)
+    except (zipfile.BadZipFile, zlib.error) as e:
+        raise HTTPException(status_code=400, detail=f"Corrupt archive member: {e}")
+    if len(content) > MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
+    return content
+
+
+def collect_images(files: list[UploadFile], archive: Optional[UploadFile]) -> dict[str, ImageLoader]:
+    """
+    Index uploaded images by file name without reading them yet
+
+    Images can be sent as individual files, inside a zip archive (useful
+    beyond the multipart file-count limit), or both.
+    """
+    loaders: dict[str, ImageLoader] = {}
+
+    for file in files:
+        async def load_file(file=file):
+            return file.content_type, await file.read()
+        loaders[file.filename] = load_file
+
+    if archive is not None:
+        try:
+            bundle = zipfile.ZipFile(archive.file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="images_archive is not a valid zip file")
+
+        members = [member for member in bundle.infolist() if not member.is_dir()]
+        # Sizes come from the zip's own headers; reads below are bounded as well
+        if sum(member.file_size for member in members) > settings.BULK_IMPORT_MAX_ARCHIVE_BYTES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"images_archive exceeds {settings.BULK_IMPORT_MAX_ARCHIVE_BYTES} bytes uncompressed"
+            )
+
+        for member in members:
+            name = os.path.basename(member.filename)
+            async def load_member(member=member, name=name):
+                if member.file_size > MAX_IMAGE_BYTES:
+                    raise HTTPException(status_code=400, detail="File size exceeds 10MB limit")
+                content = await asyncio.to_thread(_read_member, bundle, member)
+                return mimetypes.guess_type(name)[0], content
+            loaders[name] = load_member
+
+    return loaders
@@ -0,0 +1,57 @@
+"""Location normalization for indexed search"""
+import re
+import unicodedata
+
+def normalize_location(location: str) -> str:
+    """
+    Casefold, strip accents from Latin letters and collapse everything but
+    letters and digits to single spaces
+
+    Other scripts are kept as they are, with their combining vowel signs,
+    so "मुंबई" or "東京" still form searchable words.
+    """
+    chars = []
+    base_is_ascii = False
+    for char in unicodedata.normalize("NFKD", (location or "").casefold()):
+        category = unicodedata.category(char)
+        if category.startswith("M"):
+            # "é" -> "e", but "मुं" keeps its marks
+            if not base_is_ascii:
+                chars.append(char)
+            continue
+        base_is_ascii = char.isascii()
+        chars.append(char if category[0] in "LN" else " ")
+    return " ".join(unicodedata.normalize("NFC", "".join(chars)).split())
+
+
+def tokenize_location(location: str) -> list[str]:
+    """Unique tokens of a location in their original order"""
+    tokens = []
+    for token in normalize_location(location).split():
+        if token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def location_query(location: str, mode: str = "prefix") -> dict:
+    """
+    Build a pets filter for a location search
+
+    Modes:
+        prefix: every search word must start some location word (index-backed)
+        token: every search word must equal a location word (index-backed)
+        contains: legacy case-insensitive substring match (full scan)
+    """
+    if mode == "contains":
+        return {"location": {"$regex": re.escape(location), "$options": "i"}}
+
+    tokens = tokenize_location(location)
+    if not tokens:
+        # Nothing searchable (e.g. only punctuation) matches no pet
+        return {"location_tokens": {"$in": []}}
+
+    if mode == "token":
+        return {"location_tokens": {"$all": tokens}}
+
+    clauses = [{"location_tokens": {"$regex": f"^{re.escape(t)}"}} for t in tokens]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -0,0 +1,293 @@
+"""Prometheus metrics for HTTP routes, MongoDB, Cloudinary and in-process caches"""
+import os
+import time
+from contextlib import asynccontextmanager
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+from pymongo import monitoring
+from starlette.routing import Match
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method", "route"],
+    multiprocess_mode="livesum"
+)
+HTTP_REQUESTS_SHED = Counter(
+    "http_requests_shed_total",
+    "Requests rejected by admission control",
+    ["route", "reason"]
+)
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a scheduled wake-up (smoothed)",
+    multiprocess_mode="livemax"
+)
+
+# MongoDB commands
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency as reported by the driver",
+    ["command", "collection", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+# MongoDB connection pool
+MONGO_POOL_MAX_SIZE = Gauge(
+    "mongodb_pool_max_size",
+    "Configured maximum connections per server pool",
+    ["address"],
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections",
+    "Open connections per server pool",
+    ["address"],
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongodb_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ["address"],
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["address"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total",
+    "Failed connection checkouts (e.g. wait queue timeouts)",
+    ["address", "reason"]
+)
+MONGO_POOL_WARMUP_SECONDS = Gauge(
+    "mongodb_pool_warmup_seconds",
+    "Time taken to open the startup connections",
+    multiprocess_mode="livemax"
+)
+
+# Cloudinary
+CLOUDINARY_QUEUE_WAIT = Histogram(
+    "cloudinary_queue_wait_seconds",
+    "Time a Cloudinary call waited for a concurrency slot",
+    ["operation"]
+)
+CLOUDINARY_CALL_DURATION = Histogram(
+    "cloudinary_call_duration_seconds",
+    "Cloudinary SDK call latency (excluding queue wait)",
+    ["operation", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+# In-process caches (auth principals, listing counts, search facets)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "In-process cache lookups by result",
+    ["cache", "result"]
+)
+CACHE_EVICTIONS = Counter(
+    "cache_evictions_total",
+    "Entries evicted to keep an in-process cache within its size bound",
+    ["cache"]
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries",
+    "Entries currently held by an in-process cache",
+    ["cache"],
+    multiprocess_mode="livesum"
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+def _address(address) -> str:
+    host, port = address
+    return f"{host}:{port}"
+
+def route_template(scope) -> str:
+    """Route path template for a request (bounded label cardinality)"""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(method, route, str(status)).observe(
+                time.perf_counter() - started
+            )
+            in_flight.dec()
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Record driver-reported durations per command and collection"""
+
+    def __init__(self):
+        # (connection_id, request_id) -> collection name of the started command
+        self._collections = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        self._collections[(event.connection_id, event.request_id)] = (
+            target if isinstance(target, str) else "-"
+        )
+
+    def _record(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        MONGO_COMMAND_DURATION.labels(event.command_name, collection, outcome).observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def succeeded(self, event):
+        self._record(event, "success")
+
+    def failed(self, event):
+        self._record(event, "failure")
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Expose pool size, checked-out connections and checkout wait time"""
+
+    def pool_created(self, event):
+        max_size = event.options.get("maxPoolSize")
+        if max_size is not None:
+            MONGO_POOL_MAX_SIZE.labels(_address(event.address)).set(max_size)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        address = _address(event.address)
+        MONGO_POOL_CONNECTIONS.labels(address).set(0)
+        MONGO_POOL_CHECKED_OUT.labels(address).set(0)
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.labels(_address(event.address)).inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.labels(_address(event.address)).dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        address = _address(event.address)
+        MONGO_POOL_CHECKOUT_FAILURES.labels(address, str(event.reason)).inc()
+        if event.duration is not None:
+            MONGO_POOL_CHECKOUT_WAIT.labels(address).observe(event.duration)
+
+    def connection_checked_out(self, event):
+        address = _address(event.address)
+        MONGO_POOL_CHECKED_OUT.labels(address).inc()
+        if event.duration is not None:
+            MONGO_POOL_CHECKOUT_WAIT.labels(address).observe(event.duration)
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.labels(_address(event.address)).dec()
+
+
+def mongo_event_listeners() -> list:
+    """Listeners to pass to the MongoDB client"""
+    return [CommandMetricsListener(), PoolMetricsListener()]
+
+
+@asynccontextmanager
+async def time_cloudinary_call(operation: str):
+    """
+    Time one Cloudinary call, split into queue wait and SDK duration
+
+    Yields a callback to invoke once a concurrency slot is acquired.
+    """
+    queued = time.perf_counter()
+    started = None
+
+    def acquired():
+        nonlocal started
+        started = time.perf_counter()
+        CLOUDINARY_QUEUE_WAIT.labels(operation).observe(started - queued)
+
+    outcome = "failure"
+    try:
+        yield acquired
+        outcome = "success"
+    finally:
+        if started is not None:
+            CLOUDINARY_CALL_DURATION.labels(operation, outcome).observe(
+                time.perf_counter() - started
+            )
+
+
+class CacheMetrics:
+    """Metric children for one named in-process cache"""
+
+    def __init__(self, cache: str):
+        self.hit = CACHE_LOOKUPS.labels(cache, "hit")
+        self.miss = CACHE_LOOKUPS.labels(cache, "miss")
+        self.eviction = CACHE_EVICTIONS.labels(cache)
+        self.entries = CACHE_ENTRIES.labels(cache)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Serialized metrics and their content type
+
+    Under `python -m src.serve` with several workers, PROMETHEUS_MULTIPROC_DIR
+    is set and every worker's samples are merged, whichever worker is scraped.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_worker_exited():
+    """Drop this worker's live gauges from the merged multi-process view"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,50 @@
+"""Opaque keyset cursors for (created_at, _id) ordered listings"""
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+# Newest first; ties on created_at are broken by _id so ordering is total
+PET_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def encode_cursor(doc: dict) -> str:
+    """Encode the sort key of the last document on a page"""
+    payload = json.dumps({
+        "c": doc["created_at"].isoformat(),
+        "i": str(doc["_id"])
+    }, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["c"]), ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(cursor: Optional[str]) -> dict:
+    """Filter selecting documents that sort strictly after the cursor"""
+    if not cursor:
+        return {}
+
+    created_at, last_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}}
+        ]
+    }
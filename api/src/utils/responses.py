@@ -0,0 +1,29 @@
+"""Fast JSON responses for Mongo documents"""
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(obj: Any):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content with orjson, rendering ObjectIds as strings"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson
+
+    Return it directly from a route so FastAPI skips jsonable_encoder;
+    datetimes and ObjectIds in raw Mongo documents are encoded natively.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,94 @@
+"""Revocation list for session tokens, shared by all workers"""
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo.asynchronous.database import AsyncDatabase
+
+from .config import settings
+
+_EPOCH = datetime(1970, 1, 1)
+
+def session_token_id(token: str) -> str:
+    """Revocation ID for a Mongo session token (the raw token is never stored)"""
+    return "session:" + hashlib.sha256(token.encode()).hexdigest()
+
+def epoch_seconds(value: datetime) -> float:
+    """Epoch seconds for a naive UTC datetime, as Mongo returns them"""
+    return (value - _EPOCH).total_seconds()
+
+class RevocationList:
+    """
+    In-process set of revoked token IDs, synced from Mongo
+
+    IDs are a signed token's jti, or session_token_id() of a Mongo session
+    token, which other workers may still hold in their principal cache.
+    Logout writes the ID to the `revoked_tokens` collection (a TTL index
+    removes it once the token would have expired anyway) and adds it to
+    the local set; other workers pick it up on their next sync.
+    """
+
+    def __init__(self, sync_interval_seconds: float):
+        self.sync_interval_seconds = sync_interval_seconds
+        self._revoked: dict[str, float] = {}  # jti -> token expiry (epoch seconds)
+        self._last_sync: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    async def revoke(self, db: AsyncDatabase, jti: str, expires_at: float):
+        """Revoke a token everywhere: locally now, other workers on their next sync"""
+        self._revoked[jti] = expires_at
+        await db.revoked_tokens.update_one(
+            {"_id": jti},
+            {"$setOnInsert": {
+                "expires_at": datetime.utcfromtimestamp(expires_at),
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+    async def sync(self, db: AsyncDatabase):
+        """Pull revocations written since the last sync and drop expired ones"""
+        now = datetime.utcnow()
+        query = {"expires_at": {"$gt": now}}
+        if self._last_sync:
+            # Overlap slightly so writes racing the previous sync are not missed
+            query["created_at"] = {"$gte": self._last_sync - timedelta(seconds=5)}
+
+        async for doc in db.revoked_tokens.find(query, {"expires_at": 1}):
+            self._revoked[doc["_id"]] = epoch_seconds(doc["expires_at"])
+        self._last_sync = now
+
+        current = time.time()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= current]:
+            del self._revoked[jti]
+
+    async def start(self, db: AsyncDatabase):
+        """Load the current list and keep it in sync, both in the background"""
+        if not self._task:
+            self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self, db: AsyncDatabase):
+        # The first pass loads the full list; startup does not wait for it
+        while True:
+            try:
+                await self.sync(db)
+            except Exception as e:
+                print(f"✗ Failed to sync token revocation list: {e}")
+            await asyncio.sleep(self.sync_interval_seconds)
+
+    def stats(self) -> dict:
+        return {"revoked": len(self._revoked), "last_sync": self._last_sync}
+
+
+revocation_list = RevocationList(settings.SESSION_REVOCATION_SYNC_SECONDS)
@@ -1,23 +1,103 @@
+import base64
 import hashlib
+import hmac
+import json
 import secrets
+import time
 from datetime import datetime, timedelta
-from ..db.db_config import get_database
+from typing import Optional
+from pymongo.asynchronous.database import AsyncDatabase
+
+from .config import settings
+
+# Signed tokens look like "st1.<payload>.<signature>"; random Mongo
+# session tokens never contain a ".", so the two formats can coexist.
+SIGNED_TOKEN_PREFIX = "st1"
 
 def hash_password(password: str) -> str:
     """Hash password using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
 
-def create_session(user_id: str) -> str:
-    """Create a new session token"""
-    db = get_database()
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _signing_key() -> bytes:
+    if not settings.SESSION_SIGNING_SECRET:
+        raise ValueError(
+            "SESSION_SIGNING_SECRET environment variable is not set. "
+            "It is required for signed session tokens."
+        )
+    return settings.SESSION_SIGNING_SECRET.encode()
+
+def check_session_settings():
+    """
+    Fail fast on a session configuration that cannot issue tokens
+
+    Raises:
+        ValueError: If SESSION_TOKEN_FORMAT is "signed" without a SESSION_SIGNING_SECRET
+    """
+    if settings.SESSION_TOKEN_FORMAT == "signed":
+        _signing_key()
+
+def _sign(message: str) -> str:
+    return _b64encode(hmac.new(_signing_key(), message.encode(), hashlib.sha256).digest())
+
+def is_signed_token(token: str) -> bool:
+    """Whether a token uses the stateless signed format"""
+    return token.startswith(SIGNED_TOKEN_PREFIX + ".")
+
+def create_signed_token(user: dict) -> str:
+    """Create an HMAC-signed token carrying the user principal and expiry"""
+    expires_at = int(time.time()) + settings.SESSION_EXPIRE_DAYS * 86400
+    payload = _b64encode(json.dumps({
+        "uid": user["id"],
+        "typ": user["user_type"],
+        "email": user["email"],
+        "name": user["name"],
+        "exp": expires_at,
+        "jti": secrets.token_urlsafe(12)
+    }, separators=(",", ":")).encode())
+    message = f"{SIGNED_TOKEN_PREFIX}.{payload}"
+    return f"{message}.{_sign(message)}"
+
+def verify_signed_token(token: str) -> Optional[dict]:
+    """Return the token's claims if the signature is valid and it has not expired"""
+    try:
+        prefix, payload, signature = token.split(".")
+    except ValueError:
+        return None
+    
+    if prefix != SIGNED_TOKEN_PREFIX or not settings.SESSION_SIGNING_SECRET:
+        return None
+    # Compare bytes: compare_digest rejects non-ASCII str arguments
+    if not hmac.compare_digest(signature.encode(), _sign(f"{prefix}.{payload}").encode()):
+        return None
+    
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        return None
+    
+    if claims.get("exp", 0) <= time.time():
+        return None
+    return claims
+
+async def create_session(db: AsyncDatabase, user: dict) -> str:
+    """Create a new session token for a user principal (id, email, name, user_type)"""
+    if settings.SESSION_TOKEN_FORMAT == "signed":
+        return create_signed_token(user)
+    
     token = secrets.token_urlsafe(32)
-    expires_at = datetime.utcnow() + timedelta(days=7)
+    expires_at = datetime.utcnow() + timedelta(days=settings.SESSION_EXPIRE_DAYS)
     
-    db.sessions.insert_one({
-        "user_id": user_id,
+    await db.sessions.insert_one({
+        "user_id": user["id"],
         "token": token,
         "expires_at": expires_at,
         "created_at": datetime.utcnow()
     })
     
-    return token
\ No newline at end of file
+    return token
@@ -0,0 +1,79 @@
+"""Per-worker lifecycle state for readiness checks"""
+import asyncio
+import os
+import signal
+import threading
+import time
+from typing import Callable, Optional
+
+
+class WorkerState:
+    """
+    Lifecycle of this worker process: starting -> ready -> draining
+
+    Each worker (process) has its own instance, so a readiness probe
+    reports on the worker that answered it.
+    """
+
+    def __init__(self):
+        self.status = "starting"
+        self.started_at = time.monotonic()
+        self.ready_after_seconds: Optional[float] = None
+
+    def mark_ready(self):
+        if self.status == "starting":
+            self.status = "ready"
+            self.ready_after_seconds = round(time.monotonic() - self.started_at, 3)
+
+    def mark_draining(self):
+        self.status = "draining"
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status == "ready"
+
+    def describe(self) -> dict:
+        return {
+            "status": self.status,
+            "worker_pid": os.getpid(),
+            "uptime_seconds": round(time.monotonic() - self.started_at, 3),
+            "ready_after_seconds": self.ready_after_seconds
+        }
+
+
+worker_state = WorkerState()
+
+
+def drain_on_sigterm(delay_seconds: float) -> Callable[[], None]:
+    """
+    Report "draining" as soon as SIGTERM arrives, then stop after a delay
+
+    The server's own SIGTERM handler (uvicorn's, which stops accepting
+    connections) runs `delay_seconds` later, so readiness probes and load
+    balancers see the 503 while this worker still serves requests. A
+    second SIGTERM stops at once.
+
+    Returns:
+        A callable restoring the previous handler (call it on shutdown)
+    """
+    previous = signal.getsignal(signal.SIGTERM)
+    # Only wrap a server's Python-level handler, and only from the main thread
+    if delay_seconds <= 0 or not callable(previous) or threading.current_thread() is not threading.main_thread():
+        return lambda: None
+
+    loop = asyncio.get_running_loop()
+
+    def handle(sig, frame):
+        if worker_state.status == "draining":
+            previous(sig, frame)
+            return
+        worker_state.mark_draining()
+        loop.call_soon_threadsafe(loop.call_later, delay_seconds, previous, sig, frame)
+
+    signal.signal(signal.SIGTERM, handle)
+
+    def restore():
+        if signal.getsignal(signal.SIGTERM) is handle:
+            signal.signal(signal.SIGTERM, previous)
+
+    return restore
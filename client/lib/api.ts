@@ -31,10 +31,16 @@ interface Pet {
   age: number;
   location: string;
   image_url: string;
+  image_status?: 'pending' | 'ready' | 'failed';
   vaccinated: boolean;
   neutered: boolean;
   medical_notes?: string;
   created_at: string;
+  distance_km?: number;
+  ngo?: {
+    name: string;
+    email: string;
+  };
 }
 
 interface PetsResponse {
@@ -42,6 +48,21 @@ interface PetsResponse {
   total: number;
   page: number;
   limit: number;
+  next_cursor: string | null;
+}
+
+interface PetSearchResponse {
+  pets: Pet[];
+  total: number;
+  limit: number;
+  next_cursor: string | null;
+  facets: {
+    type: Record<string, number>;
+    vaccinated: Record<string, number>;
+    neutered: Record<string, number>;
+    age: Record<string, number>;
+    location: Record<string, number>;
+  };
 }
 
 class ApiService {
@@ -123,12 +144,18 @@ class ApiService {
     location?: string;
     limit?: number;
     skip?: number;
+    cursor?: string;
+    near?: string;
+    radius_km?: number;
   }): Promise<PetsResponse> {
     const params = new URLSearchParams();
     if (filters?.type && filters.type !== 'All') params.append('type', filters.type);
     if (filters?.location) params.append('location', filters.location);
     if (filters?.limit) params.append('limit', filters.limit.toString());
     if (filters?.skip) params.append('skip', filters.skip.toString());
+    if (filters?.cursor) params.append('cursor', filters.cursor);
+    if (filters?.near) params.append('near', filters.near);
+    if (filters?.radius_km) params.append('radius_km', filters.radius_km.toString());
 
     const response = await fetch(`${API_BASE_URL}/api/pets?${params.toString()}`);
 
@@ -139,6 +166,33 @@ class ApiService {
     return response.json();
   }
 
+  async searchPets(filters?: {
+    type?: string;
+    vaccinated?: boolean;
+    neutered?: boolean;
+    age_bucket?: string;
+    location?: string;
+    limit?: number;
+    cursor?: string;
+  }): Promise<PetSearchResponse> {
+    const params = new URLSearchParams();
+    if (filters?.type && filters.type !== 'All') params.append('type', filters.type);
+    if (filters?.vaccinated !== undefined) params.append('vaccinated', String(filters.vaccinated));
+    if (filters?.neutered !== undefined) params.append('neutered', String(filters.neutered));
+    if (filters?.age_bucket) params.append('age_bucket', filters.age_bucket);
+    if (filters?.location) params.append('location', filters.location);
+    if (filters?.limit) params.append('limit', filters.limit.toString());
+    if (filters?.cursor) params.append('cursor', filters.cursor);
+
+    const response = await fetch(`${API_BASE_URL}/api/pets/search?${params.toString()}`);
+
+    if (!response.ok) {
+      throw new Error('Failed to search pets');
+    }
+
+    return response.json();
+  }
+
   async getPetById(id: string): Promise<Pet> {
     const response = await fetch(`${API_BASE_URL}/api/pets/${id}`);
 
@@ -204,4 +258,4 @@ class ApiService {
 }
 
 export const api = new ApiService();
-export type { Pet, AuthResponse, PetsResponse };
+export type { Pet, AuthResponse, PetsResponse, PetSearchResponse };